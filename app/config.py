@@ -2,11 +2,32 @@
 Configuration management for FileConverter Pro.
 All settings can be overridden via environment variables.
 """
+from functools import cached_property, lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 import os
 
 
+class CloudSettings(BaseSettings):
+    """
+    Cloud storage settings.
+    
+    Only read when a cloud backend is actually used, so the
+    default local setup never pays for them.
+    """
+    
+    # AWS S3 Configuration (Optional)
+    AWS_ACCESS_KEY_ID: Optional[str] = None
+    AWS_SECRET_ACCESS_KEY: Optional[str] = None
+    AWS_S3_BUCKET: Optional[str] = None
+    AWS_S3_REGION: str = "us-east-1"
+    
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
+        extra = "ignore"
+
+
 class Settings(BaseSettings):
     """Application settings with environment variable support."""
     
@@ -14,6 +35,7 @@ class Settings(BaseSettings):
     APP_NAME: str = "FileConverter Pro"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
+    SERVE_STATIC: bool = True  # Set False when nginx/CDN serves /static/
     
     # Server
     HOST: str = "0.0.0.0"
@@ -25,7 +47,7 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     REDIS_URL: Optional[str] = None
     
-    @property
+    @cached_property
     def redis_url(self) -> str:
         """Get Redis URL, either from REDIS_URL or construct from components."""
         if self.REDIS_URL:
@@ -35,19 +57,22 @@ class Settings(BaseSettings):
     # Celery Configuration
     CELERY_BROKER_URL: Optional[str] = None
     CELERY_RESULT_BACKEND: Optional[str] = None
-    CELERY_TASK_SERIALIZER: str = "json"
+    CELERY_TASK_SERIALIZER: str = "msgpack"
     CELERY_RESULT_SERIALIZER: str = "json"
-    CELERY_ACCEPT_CONTENT: list = ["json"]
+    CELERY_ACCEPT_CONTENT: list = ["msgpack", "json"]
+    CELERY_TASK_COMPRESSION: Optional[str] = "zstd"  # None to disable
     CELERY_TIMEZONE: str = "UTC"
     CELERY_ENABLE_UTC: bool = True
     CELERY_WORKER_CONCURRENCY: int = 2
+    MAX_CONCURRENT_CONVERSIONS: int = 4  # Files converted in parallel within one task
+    CELERY_INSPECT_TIMEOUT: float = 0.5  # Seconds to wait for worker replies
     
-    @property
+    @cached_property
     def celery_broker(self) -> str:
         """Get Celery broker URL."""
         return self.CELERY_BROKER_URL or self.redis_url
     
-    @property
+    @cached_property
     def celery_backend(self) -> str:
         """Get Celery result backend URL."""
         return self.CELERY_RESULT_BACKEND or self.redis_url
@@ -57,24 +82,27 @@ class Settings(BaseSettings):
     TEMP_DIR: str = "/tmp/file_converter"
     INPUT_DIR: str = "/tmp/file_converter/input"
     OUTPUT_DIR: str = "/tmp/file_converter/output"
+    TEMPLATE_CACHE_DIR: str = "/tmp/file_converter/jinja_cache"
     
     # File Limits
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
     MAX_FILES_PER_REQUEST: int = 10
     FILE_RETENTION_MINUTES: int = 60
+    PRESERVE_METADATA: bool = False  # Keep timestamps/permissions when copying into storage
+    CHECKSUM_ALGORITHM: str = "sha256"  # "sha256" or "blake3" (needs the blake3 package)
     
     # Allowed File Types
-    ALLOWED_MIME_TYPES: set = {
+    ALLOWED_MIME_TYPES: frozenset = frozenset({
         "image/jpeg",
         "image/png",
         "image/webp",
         "application/pdf",
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # DOCX
-    }
+    })
     
-    ALLOWED_EXTENSIONS: set = {
+    ALLOWED_EXTENSIONS: frozenset = frozenset({
         "jpg", "jpeg", "png", "webp", "pdf", "docx"
-    }
+    })
     
     # Conversion Formats
     SUPPORTED_CONVERSIONS: dict = {
@@ -89,13 +117,14 @@ class Settings(BaseSettings):
     # Security
     RATE_LIMIT_PER_HOUR: int = 50
     ENABLE_RATE_LIMITING: bool = True
+    RATE_LIMIT_BACKEND: str = "redis"  # "redis" (shared across processes) or "memory"
     SECRET_KEY: str = "change-this-in-production-use-env-variable"
+    TRUST_PROXY_HEADERS: bool = False  # Use X-Forwarded-For behind a reverse proxy
     
-    # AWS S3 Configuration (Optional)
-    AWS_ACCESS_KEY_ID: Optional[str] = None
-    AWS_SECRET_ACCESS_KEY: Optional[str] = None
-    AWS_S3_BUCKET: Optional[str] = None
-    AWS_S3_REGION: str = "us-east-1"
+    @cached_property
+    def cloud(self) -> CloudSettings:
+        """Get cloud storage settings (loaded on first access)."""
+        return CloudSettings()
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -108,25 +137,61 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = True
+        extra = "ignore"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the cached application settings.
+    
+    The environment and .env file are parsed once per process. Modules
+    bind the returned instance at import, so clearing the cache does not
+    reach them; set environment variables before importing the app, or
+    patch attributes on the shared instance.
+    
+    Returns:
+        Settings instance
+    """
+    return Settings()
 
 
 # Global settings instance
-settings = Settings()
+settings = get_settings()
+
+
+# Set once the required directories have been created
+_dirs_created = False
 
 
 # Ensure required directories exist
 def ensure_directories():
-    """Create required directories if they don't exist."""
+    """
+    Create required directories if they don't exist.
+    
+    Runs once per process; later calls are no-ops.
+    """
+    global _dirs_created
+    
+    if _dirs_created:
+        return
+    
     directories = [
         settings.TEMP_DIR,
         settings.INPUT_DIR,
         settings.OUTPUT_DIR,
         settings.LOG_DIR,
+        settings.TEMPLATE_CACHE_DIR,
     ]
     
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
-
-
-# Initialize directories on import
-ensure_directories()
+        # A single mkdir is enough on the common path
+        try:
+            os.mkdir(directory)
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            # Missing parent directories
+            os.makedirs(directory, exist_ok=True)
+    
+    _dirs_created = True
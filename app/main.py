@@ -4,12 +4,32 @@ A production-ready SaaS platform for file conversions.
 """
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.types import Scope
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.config import settings, ensure_directories
+from app.config import get_settings, ensure_directories
 from app.routes import web, api
 from app.utils.logger import app_logger
+from app.utils.security import ClientIPMiddleware
+
+settings = get_settings()
+
+# No favicon is shipped; let browsers cache the empty reply for a day
+FAVICON_HEADERS = {"Cache-Control": "public, max-age=86400"}
+
+
+class CachingStatic(StaticFiles):
+    """
+    StaticFiles that marks assets as immutable.
+    Asset URLs carry a ?v=<APP_VERSION> query, so clients never need to revalidate.
+    """
+    
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
 
 @asynccontextmanager
@@ -21,6 +41,7 @@ async def lifespan(app: FastAPI):
     # Startup
     app_logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     ensure_directories()
+    web.cache_homepage(app)
     app_logger.info("Application started successfully")
     
     yield
@@ -34,6 +55,7 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Production-ready SaaS platform for file conversions",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
@@ -46,8 +68,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Resolve client IP once per request
+app.add_middleware(ClientIPMiddleware)
+
+# Mount static files (disable when a reverse proxy serves /static/)
+if settings.SERVE_STATIC:
+    app.mount("/static", CachingStatic(directory="app/static"), name="static")
 
 # Include routers
 app.include_router(web.router, tags=["web"])
@@ -57,8 +83,7 @@ app.include_router(api.router, tags=["api"])
 @app.get("/favicon.ico")
 async def favicon():
     """Favicon endpoint."""
-    from fastapi.responses import Response
-    return Response(status_code=204)
+    return Response(status_code=204, headers=FAVICON_HEADERS)
 
 
 if __name__ == "__main__":
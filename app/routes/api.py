@@ -2,21 +2,23 @@
 API routes for FileConverter Pro.
 Handles file conversion requests and task status.
 """
+import asyncio
 import os
 import time
-from typing import List
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
-from celery.result import AsyncResult
+from typing import Any, Dict, List
+import aiofiles
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import FileResponse, ORJSONResponse
 
 from app.workers.celery_app import celery_app
 from app.workers.celery_worker import process_conversion_task
-from app.config import settings
+from app.config import get_settings
 from app.utils.security import (
     validate_upload_file,
     validate_file_extension,
+    validate_file_size,
     validate_conversion_format,
-    check_rate_limit,
+    enforce_rate_limit,
     check_malicious_filename,
     validate_mime_type,
 )
@@ -24,14 +26,107 @@ from app.utils.file_utils import (
     generate_unique_filename,
     get_file_extension,
     sanitize_filename,
+    secure_delete_file,
 )
+from app.utils.cache import ttl_cache
 from app.utils.logger import app_logger, log_api_request
-from app.services.storage import storage
+from app.services import monitoring
+
+settings = get_settings()
 
 router = APIRouter()
 
+# Read uploads in 1MB chunks to keep memory usage flat
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Seconds to reuse task metadata between status polls
+TASK_META_CACHE_TTL = 0.2
+
+# Media types for converted file downloads, keyed by extension
+MEDIA_TYPES = {
+    ".zip": "application/zip",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
 
-@router.post("/convert")
+async def _ingest_upload(file: UploadFile, target_format: str) -> Dict[str, str]:
+    """
+    Validate a single uploaded file and save it to the input directory.
+    
+    Args:
+        file: Uploaded file
+        target_format: Target conversion format
+        
+    Returns:
+        Dict with 'path' and 'filename' keys
+        
+    Raises:
+        HTTPException: If validation fails
+    """
+    # Validate filename
+    check_malicious_filename(file.filename)
+    
+    # Validate file
+    await validate_upload_file(file)
+    
+    # Get source format
+    source_format = get_file_extension(file.filename)
+    
+    # Validate conversion
+    validate_conversion_format(source_format, target_format)
+    
+    # Generate unique filename
+    unique_filename = generate_unique_filename(file.filename)
+    file_path = os.path.join(settings.INPUT_DIR, unique_filename)
+    
+    # Save file in chunks, enforcing the size limit as we go
+    bytes_written = 0
+    header = b""
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if not bytes_written:
+                    header = chunk
+                bytes_written += len(chunk)
+                validate_file_size(bytes_written)
+                await f.write(chunk)
+        
+        # Validate MIME type from the first chunk already in memory
+        validate_mime_type(header)
+    except Exception:
+        secure_delete_file(file_path)
+        raise
+    
+    app_logger.info(f"Uploaded file: {file.filename} -> {unique_filename}")
+    
+    return {
+        'path': file_path,
+        'filename': file.filename,
+    }
+
+
+@ttl_cache(TASK_META_CACHE_TTL, maxsize=1024)
+def get_task_meta(task_id: str) -> Dict[str, Any]:
+    """
+    Fetch task state and result from the result backend in one call.
+    
+    Briefly cached so rapid status polls share a single backend read.
+    
+    Args:
+        task_id: Celery task ID
+        
+    Returns:
+        Task metadata dict with 'status' and 'result' keys
+    """
+    return celery_app.backend.get_task_meta(task_id)
+
+
+@router.post("/convert", status_code=202, dependencies=[Depends(enforce_rate_limit)])
 async def convert_files(
     request: Request,
     files: List[UploadFile] = File(...),
@@ -48,21 +143,19 @@ async def convert_files(
     Returns:
         JSON with task ID and status
     """
-    start_time = time.time()
-    client_ip = request.client.host
+    start_ns = time.perf_counter_ns()
+    client_ip = request.state.client_ip
+    n_files = len(files)
     
     try:
-        # Check rate limit
-        check_rate_limit(client_ip)
-        
         # Validate number of files
-        if len(files) > settings.MAX_FILES_PER_REQUEST:
+        if n_files > settings.MAX_FILES_PER_REQUEST:
             raise HTTPException(
                 status_code=400,
                 detail=f"Too many files. Maximum: {settings.MAX_FILES_PER_REQUEST}"
             )
         
-        if not files:
+        if not n_files:
             raise HTTPException(status_code=400, detail="No files uploaded")
         
         # Validate target format
@@ -73,40 +166,21 @@ async def convert_files(
                 detail=f"Invalid target format: {target_format}"
             )
         
-        # Process uploaded files
-        uploaded_files = []
+        # Validate and save all uploaded files concurrently
+        results = await asyncio.gather(
+            *(_ingest_upload(file, target_format) for file in files),
+            return_exceptions=True,
+        )
         
-        for file in files:
-            # Validate filename
-            check_malicious_filename(file.filename)
-            
-            # Validate file
-            await validate_upload_file(file)
-            
-            # Get source format
-            source_format = get_file_extension(file.filename)
-            
-            # Validate conversion
-            validate_conversion_format(source_format, target_format)
-            
-            # Generate unique filename
-            unique_filename = generate_unique_filename(file.filename)
-            file_path = os.path.join(settings.INPUT_DIR, unique_filename)
-            
-            # Save file
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            
-            # Validate MIME type
-            validate_mime_type(file_path)
-            
-            uploaded_files.append({
-                'path': file_path,
-                'filename': file.filename,
-            })
-            
-            app_logger.info(f"Uploaded file: {file.filename} -> {unique_filename}")
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if failures:
+            # Don't leave the successfully saved siblings behind
+            for r in results:
+                if not isinstance(r, BaseException):
+                    secure_delete_file(r['path'])
+            raise failures[0]
+        
+        uploaded_files = list(results)
         
         # Queue conversion task
         task = process_conversion_task.delay(
@@ -115,21 +189,19 @@ async def convert_files(
             {'client_ip': client_ip}
         )
         
-        duration_ms = (time.time() - start_time) * 1000
+        duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         log_api_request("POST", "/convert", 202, client_ip, duration_ms)
         
-        app_logger.info(f"Queued conversion task {task.id} for {len(files)} file(s)")
+        files_label = f"{n_files} file(s)"
+        app_logger.info(f"Queued conversion task {task.id} for {files_label}")
         
-        return JSONResponse(
-            status_code=202,
-            content={
-                "status": "queued",
-                "task_id": task.id,
-                "message": f"Conversion queued for {len(files)} file(s)",
-                "files_count": len(files),
-                "target_format": target_format,
-            }
-        )
+        return {
+            "status": "queued",
+            "task_id": task.id,
+            "message": f"Conversion queued for {files_label}",
+            "files_count": n_files,
+            "target_format": target_format,
+        }
         
     except HTTPException:
         raise
@@ -150,23 +222,24 @@ async def get_task_status(request: Request, task_id: str):
     Returns:
         JSON with task status
     """
-    start_time = time.time()
-    client_ip = request.client.host
+    start_ns = time.perf_counter_ns()
+    client_ip = request.state.client_ip
     
     try:
-        task_result = AsyncResult(task_id, app=celery_app)
+        meta = get_task_meta(task_id)
+        state = meta["status"]
         
         response = {
             "task_id": task_id,
-            "status": task_result.state,
+            "status": state,
         }
         
-        if task_result.state == "PENDING":
+        if state == "PENDING":
             response["message"] = "Task is pending"
-        elif task_result.state == "STARTED":
+        elif state == "STARTED":
             response["message"] = "Task is processing"
-        elif task_result.state == "SUCCESS":
-            result = task_result.result
+        elif state == "SUCCESS":
+            result = meta["result"]
             response["message"] = "Task completed successfully"
             response["result"] = result
             
@@ -176,13 +249,13 @@ async def get_task_status(request: Request, task_id: str):
                 filename = output.get('filename')
                 if filename:
                     response["download_url"] = f"/download/{task_id}"
-        elif task_result.state == "FAILURE":
+        elif state == "FAILURE":
             response["message"] = "Task failed"
-            response["error"] = str(task_result.info)
+            response["error"] = str(meta["result"])
         else:
-            response["message"] = f"Task state: {task_result.state}"
+            response["message"] = f"Task state: {state}"
         
-        duration_ms = (time.time() - start_time) * 1000
+        duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         log_api_request("GET", f"/status/{task_id}", 200, client_ip, duration_ms)
         
         return response
@@ -204,19 +277,19 @@ async def download_converted_file(request: Request, task_id: str):
     Returns:
         File download response
     """
-    start_time = time.time()
-    client_ip = request.client.host
+    start_ns = time.perf_counter_ns()
+    client_ip = request.state.client_ip
     
     try:
-        task_result = AsyncResult(task_id, app=celery_app)
+        meta = get_task_meta(task_id)
         
-        if task_result.state != "SUCCESS":
+        if meta["status"] != "SUCCESS":
             raise HTTPException(
                 status_code=404,
                 detail="Conversion not complete or task not found"
             )
         
-        result = task_result.result
+        result = meta["result"]
         
         if not result or result.get('status') != 'success':
             raise HTTPException(status_code=404, detail="Conversion failed")
@@ -225,32 +298,29 @@ async def download_converted_file(request: Request, task_id: str):
         file_path = output.get('path')
         filename = output.get('filename')
         
-        if not file_path or not os.path.exists(file_path):
+        # Stat once here and hand the result to FileResponse
+        try:
+            stat_result = os.stat(file_path) if file_path else None
+        except OSError:
+            stat_result = None
+        
+        if stat_result is None:
             raise HTTPException(status_code=404, detail="File not found")
         
-        duration_ms = (time.time() - start_time) * 1000
+        duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         log_api_request("GET", f"/download/{task_id}", 200, client_ip, duration_ms)
         
         # Determine media type
-        if filename.endswith('.zip'):
-            media_type = "application/zip"
-        elif filename.endswith('.pdf'):
-            media_type = "application/pdf"
-        elif filename.endswith('.docx'):
-            media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        elif filename.endswith(('.jpg', '.jpeg')):
-            media_type = "image/jpeg"
-        elif filename.endswith('.png'):
-            media_type = "image/png"
-        elif filename.endswith('.webp'):
-            media_type = "image/webp"
-        else:
-            media_type = "application/octet-stream"
+        media_type = MEDIA_TYPES.get(
+            os.path.splitext(filename)[1].lower(),
+            "application/octet-stream"
+        )
         
         return FileResponse(
             path=file_path,
             filename=filename,
             media_type=media_type,
+            stat_result=stat_result,
         )
         
     except HTTPException:
@@ -272,32 +342,31 @@ async def health_check(request: Request):
         # Check Redis connection
         redis_ok = False
         try:
-            celery_app.backend.client.ping()
+            await asyncio.to_thread(celery_app.backend.client.ping)
             redis_ok = True
-        except:
+        except Exception:
             pass
         
         # Check Celery workers
-        inspector = celery_app.control.inspect()
-        active_workers = inspector.active()
-        workers_ok = active_workers is not None and len(active_workers) > 0
+        active_workers = await asyncio.to_thread(monitoring.get_active_tasks)
+        workers_ok = len(active_workers) > 0
         
         # Get storage stats
-        storage_stats = storage.get_storage_usage()
+        storage_stats = await asyncio.to_thread(monitoring.get_storage_usage)
         
         overall_health = "healthy" if (redis_ok and workers_ok) else "degraded"
         
         return {
             "status": overall_health,
             "redis": "connected" if redis_ok else "disconnected",
-            "workers": len(active_workers) if active_workers else 0,
+            "workers": len(active_workers),
             "storage": storage_stats,
             "app_version": settings.APP_VERSION,
         }
         
     except Exception as e:
         app_logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
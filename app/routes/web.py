@@ -2,24 +2,76 @@
 Web interface routes for FileConverter Pro.
 Renders HTML templates using Jinja2.
 """
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+import asyncio
+import hashlib
+from types import MappingProxyType
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
-from app.config import settings
-from app.services.storage import storage
-from app.workers.celery_app import celery_app
+from app.config import get_settings
+from app.services import monitoring
+
+settings = get_settings()
 
 router = APIRouter()
 
-# Jinja2 templates
-templates = Jinja2Templates(directory="app/templates")
+# Jinja2 templates, with compiled bytecode cached on disk across restarts
+# (the cache directory is created by ensure_directories() at startup)
+templates = Jinja2Templates(
+    env=Environment(
+        loader=FileSystemLoader("app/templates"),
+        bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR),
+        auto_reload=settings.DEBUG,
+        autoescape=True,
+    )
+)
+templates.env.globals["static_version"] = settings.APP_VERSION
+
+# Homepage values derived from settings, computed once
+ALLOWED_EXTENSIONS_SORTED = sorted(settings.ALLOWED_EXTENSIONS)
+SUPPORTED_CONVERSIONS = MappingProxyType(settings.SUPPORTED_CONVERSIONS)
+MAX_FILE_SIZE_MB = settings.MAX_FILE_SIZE / (1024 * 1024)
+
+
+def make_etag(content: str) -> str:
+    """
+    Build a strong ETag for response content.
+    
+    Args:
+        content: Response body or a representation of its inputs
+        
+    Returns:
+        Quoted ETag value
+    """
+    return f'"{hashlib.md5(content.encode("utf-8")).hexdigest()}"'
+
+
+def cache_homepage(app: FastAPI) -> None:
+    """
+    Render the homepage once and store it on the application state.
+    
+    The page only depends on settings, so it never changes at runtime.
+    
+    Args:
+        app: FastAPI application
+    """
+    html = templates.get_template("index.html").render(
+        app_name=settings.APP_NAME,
+        max_file_size_mb=MAX_FILE_SIZE_MB,
+        max_files=settings.MAX_FILES_PER_REQUEST,
+        supported_conversions=SUPPORTED_CONVERSIONS,
+        allowed_extensions=ALLOWED_EXTENSIONS_SORTED,
+    )
+    app.state.index_html = html
+    app.state.index_etag = make_etag(html)
 
 
 @router.get("/", response_class=HTMLResponse)
 async def homepage(request: Request):
     """
-    Render homepage with file upload interface.
+    Serve homepage with file upload interface.
     
     Args:
         request: FastAPI request object
@@ -27,17 +79,14 @@ async def homepage(request: Request):
     Returns:
         HTML response
     """
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "app_name": settings.APP_NAME,
-            "max_file_size_mb": settings.MAX_FILE_SIZE / (1024 * 1024),
-            "max_files": settings.MAX_FILES_PER_REQUEST,
-            "supported_conversions": settings.SUPPORTED_CONVERSIONS,
-            "allowed_extensions": sorted(settings.ALLOWED_EXTENSIONS),
-        }
-    )
+    state = request.app.state
+    if not hasattr(state, "index_html"):
+        cache_homepage(request.app)
+    
+    if request.headers.get("if-none-match") == state.index_etag:
+        return Response(status_code=304, headers={"ETag": state.index_etag})
+    
+    return HTMLResponse(state.index_html, headers={"ETag": state.index_etag})
 
 
 @router.get("/admin", response_class=HTMLResponse)
@@ -52,30 +101,27 @@ async def admin_dashboard(request: Request):
         HTML response
     """
     try:
-        # Get Celery inspector
-        inspector = celery_app.control.inspect()
+        # Query all workers in one concurrent round
+        overview = await asyncio.to_thread(monitoring.get_cluster_overview)
         
         # Get active tasks
-        active_tasks = inspector.active() or {}
-        active_count = sum(len(tasks) for tasks in active_tasks.values())
+        active_count = sum(len(tasks) for tasks in overview["active"].values())
         
         # Get scheduled tasks
-        scheduled_tasks = inspector.scheduled() or {}
-        scheduled_count = sum(len(tasks) for tasks in scheduled_tasks.values())
+        scheduled_count = sum(len(tasks) for tasks in overview["scheduled"].values())
         
         # Get reserved tasks
-        reserved_tasks = inspector.reserved() or {}
-        reserved_count = sum(len(tasks) for tasks in reserved_tasks.values())
+        reserved_count = sum(len(tasks) for tasks in overview["reserved"].values())
         
         # Get registered tasks
-        registered_tasks = inspector.registered() or {}
+        registered_tasks = overview["registered"]
         
         # Get worker stats
-        stats = inspector.stats() or {}
+        stats = overview["stats"]
         worker_count = len(stats)
         
         # Get storage usage
-        storage_stats = storage.get_storage_usage()
+        storage_stats = await asyncio.to_thread(monitoring.get_storage_usage)
         
         # Prepare worker details
         worker_details = []
@@ -86,6 +132,18 @@ async def admin_dashboard(request: Request):
                 'max_concurrency': worker_stats.get('pool', {}).get('max-concurrency', 'N/A'),
             })
         
+        # Skip rendering if the browser already has this exact page
+        etag = make_etag(repr((
+            active_count,
+            scheduled_count,
+            reserved_count,
+            worker_details,
+            storage_stats,
+            registered_tasks,
+        )))
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
         return templates.TemplateResponse(
             "admin.html",
             {
@@ -99,7 +157,8 @@ async def admin_dashboard(request: Request):
                 "worker_details": worker_details,
                 "storage_stats": storage_stats,
                 "registered_tasks": registered_tasks,
-            }
+            },
+            headers={"ETag": etag},
         )
         
     except Exception as e:
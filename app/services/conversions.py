@@ -2,19 +2,94 @@
 File conversion services for FileConverter Pro.
 Handles image, PDF, and DOCX conversions.
 """
+import io
 import os
+import shutil
 import subprocess
+import threading
 import zipfile
+from contextlib import closing
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
-from PIL import Image
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import PIL
+from PIL import Image, features
 import img2pdf
 from pdf2docx import Converter
 from pdf2image import convert_from_path
 
+try:
+    import pymupdf
+except ImportError:  # Fall back to pdf2image/poppler for rendering
+    pymupdf = None
+
 from app.config import settings
+from app.utils.concurrency import cpu_pool
 from app.utils.logger import app_logger, error_logger
-from app.utils.file_utils import get_conversion_output_filename
+from app.utils.file_utils import get_conversion_output_filename, get_file_extension
+
+
+def describe_imaging_build() -> str:
+    """
+    Describe the Pillow build doing the pixel work.
+    
+    Pillow-SIMD publishes versions with a ``.postN`` suffix, which is how a
+    silent fallback to stock (scalar) Pillow shows up in the worker logs.
+    
+    Returns:
+        Human-readable build summary
+    """
+    build = "Pillow-SIMD" if ".post" in PIL.__version__ else "Pillow (stock)"
+    jpeg = "libjpeg-turbo" if features.check_feature("libjpeg_turbo") else "libjpeg"
+    webp = "webp" if features.check_module("webp") else "no webp"
+    return f"{build} {PIL.__version__} ({jpeg}, {webp})"
+
+
+app_logger.info(f"Imaging backend: {describe_imaging_build()}")
+
+
+# Formats that are already compressed and gain nothing from deflate
+STORED_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'webp', 'pdf', 'docx', 'zip'})
+ZIP_BUFFER_SIZE = 1024 * 1024
+
+# ZipInfo exposes the deflate level as compress_level from Python 3.13
+ZIPINFO_LEVEL_ATTR = 'compress_level' if hasattr(zipfile.ZipInfo, 'compress_level') else '_compresslevel'
+
+# Image extensions convertible between each other
+IMAGE_FORMATS = ('jpg', 'jpeg', 'png', 'webp')
+
+# Pillow format names for the image extensions we handle
+PIL_FORMATS = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}
+
+# Default JPEG/WebP quality; same-format copies only apply at this setting
+DEFAULT_IMAGE_QUALITY = 95
+
+# Image modes that carry transparency and must be flattened for JPEG/PDF
+ALPHA_MODES = ('RGBA', 'LA', 'P')
+
+# PyMuPDF (also used by pdf2docx) is not thread-safe, so only one thread
+# per process may use it at a time
+_pymupdf_lock = threading.Lock()
+
+
+def _flatten_to_rgb(img: Image.Image) -> Image.Image:
+    """
+    Composite an image with transparency onto a white background.
+    
+    Done as a single vectorised NumPy pass instead of Image.new + paste.
+    
+    Args:
+        img: Image in RGBA, LA or P mode
+        
+    Returns:
+        Opaque RGB image
+    """
+    arr = np.asarray(img.convert('RGBA'))
+    rgb = arr[..., :3].astype(np.uint16)
+    alpha = arr[..., 3:4].astype(np.uint16)
+    out = (rgb * alpha + 255 * (255 - alpha) + 127) // 255
+    return Image.fromarray(out.astype(np.uint8), 'RGB')
 
 
 class ConversionError(Exception):
@@ -28,13 +103,73 @@ class FileConverter:
     def __init__(self):
         """Initialize converter."""
         self.libreoffice_path = settings.LIBREOFFICE_PATH
+        self._libreoffice_lock = threading.Lock()
+        self._dispatch = self._build_dispatch()
+    
+    def _build_dispatch(self) -> Dict[Tuple[str, str], Callable[[str, str], str]]:
+        """
+        Map each (source, target) format pair to its conversion handler.
+        
+        Returns:
+            Dict of handlers taking (input_path, output_path)
+        """
+        dispatch = {}
+        
+        # Image conversions
+        for source in IMAGE_FORMATS:
+            for target in IMAGE_FORMATS:
+                dispatch[(source, target)] = partial(
+                    self._convert_image_pair, source_format=source, target_format=target
+                )
+            dispatch[(source, 'pdf')] = self._convert_image_to_pdf
+        
+        # PDF conversions
+        dispatch[('pdf', 'docx')] = self.convert_pdf_to_docx
+        for target in ('jpg', 'jpeg', 'png'):
+            dispatch[('pdf', target)] = partial(self._pdf_to_single_image, target_format=target)
+        
+        # DOCX conversions
+        dispatch[('docx', 'pdf')] = self.convert_docx_to_pdf
+        
+        return dispatch
+    
+    def _convert_image_pair(
+        self,
+        input_path: str,
+        output_path: str,
+        source_format: str,
+        target_format: str
+    ) -> str:
+        """Convert one image between formats."""
+        return self.convert_image(
+            input_path,
+            output_path,
+            target_format,
+            source_format=source_format
+        )
+    
+    def _convert_image_to_pdf(self, input_path: str, output_path: str) -> str:
+        """Convert one image to a single-page PDF."""
+        return self.convert_images_to_pdf([input_path], output_path)
+    
+    def _pdf_to_single_image(
+        self,
+        input_path: str,
+        output_path: str,
+        target_format: str
+    ) -> Optional[str]:
+        """Convert PDF pages to images and return the first page."""
+        output_dir = os.path.dirname(output_path)
+        images = self.convert_pdf_to_images(input_path, output_dir, target_format)
+        return images[0] if images else None
     
     def convert_image(
         self,
         input_path: str,
         output_path: str,
         target_format: str,
-        quality: int = 95
+        quality: int = DEFAULT_IMAGE_QUALITY,
+        source_format: Optional[str] = None
     ) -> str:
         """
         Convert image format using Pillow.
@@ -44,6 +179,8 @@ class FileConverter:
             output_path: Output image path
             target_format: Target format (jpg, png, webp)
             quality: Image quality (1-100)
+            source_format: Source format, if known; same-format requests
+                at the default quality are copied instead of re-encoded
             
         Returns:
             Output file path
@@ -51,29 +188,39 @@ class FileConverter:
         Raises:
             ConversionError: If conversion fails
         """
+        target = target_format.lower()
+        pil_format = PIL_FORMATS.get(target, target.upper())
+        
+        same_format = (
+            quality == DEFAULT_IMAGE_QUALITY
+            and source_format is not None
+            and PIL_FORMATS.get(source_format.lower()) == pil_format
+        )
+        
         try:
             with Image.open(input_path) as img:
-                # Convert RGBA to RGB for JPG
-                if target_format.lower() in ['jpg', 'jpeg'] and img.mode in ['RGBA', 'LA', 'P']:
-                    # Create white background
-                    rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = rgb_img
+                # Same format: the original bytes are already the best result,
+                # provided the content really is that format (only the header is read)
+                if same_format and img.format == pil_format:
+                    shutil.copyfile(input_path, output_path)
+                    app_logger.info(f"Copied image without re-encoding: {input_path} -> {output_path}")
+                    return output_path
+                
+                # Flatten transparency onto white for JPG
+                if pil_format == 'JPEG' and img.mode in ALPHA_MODES:
+                    img = _flatten_to_rgb(img)
                 
                 # Save with appropriate format
-                save_kwargs = {}
-                if target_format.lower() in ['jpg', 'jpeg']:
-                    save_kwargs['quality'] = quality
-                    save_kwargs['optimize'] = True
-                elif target_format.lower() == 'webp':
-                    save_kwargs['quality'] = quality
-                    save_kwargs['method'] = 6  # Best quality
-                elif target_format.lower() == 'png':
-                    save_kwargs['optimize'] = True
+                if pil_format == 'JPEG':
+                    save_kwargs = {'quality': quality, 'optimize': True}
+                elif pil_format == 'WEBP':
+                    save_kwargs = {'quality': quality, 'method': 6}  # Best quality
+                elif pil_format == 'PNG':
+                    save_kwargs = {'optimize': True}
+                else:
+                    save_kwargs = {}
                 
-                img.save(output_path, format=target_format.upper(), **save_kwargs)
+                img.save(output_path, format=pil_format, **save_kwargs)
             
             app_logger.info(f"Converted image: {input_path} -> {output_path}")
             return output_path
@@ -82,6 +229,29 @@ class FileConverter:
             error_logger.error(f"Image conversion failed: {e}")
             raise ConversionError(f"Image conversion failed: {str(e)}")
     
+    def _prepare_pdf_page(self, img_path: str) -> bytes:
+        """
+        Get the bytes img2pdf should embed for one image.
+        
+        Opaque images are passed through untouched so JPEGs are embedded
+        without re-encoding. Transparent images are flattened and stored as
+        a fast, lossless PNG.
+        
+        Args:
+            img_path: Image path
+            
+        Returns:
+            Encoded image bytes
+        """
+        with Image.open(img_path) as img:
+            if img.mode in ALPHA_MODES:
+                buffer = io.BytesIO()
+                _flatten_to_rgb(img).save(buffer, 'PNG', optimize=False, compress_level=1)
+                return buffer.getvalue()
+        
+        with open(img_path, 'rb') as f:
+            return f.read()
+    
     def convert_images_to_pdf(
         self,
         input_paths: List[str],
@@ -101,36 +271,10 @@ class FileConverter:
             ConversionError: If conversion fails
         """
         try:
-            # Convert all images to RGB if needed
-            processed_images = []
-            
-            for img_path in input_paths:
-                with Image.open(img_path) as img:
-                    # Convert to RGB if necessary
-                    if img.mode in ['RGBA', 'LA', 'P']:
-                        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                        if img.mode == 'P':
-                            img = img.convert('RGBA')
-                        if img.mode == 'RGBA':
-                            rgb_img.paste(img, mask=img.split()[-1])
-                        else:
-                            rgb_img.paste(img)
-                        
-                        # Save temporary RGB version
-                        temp_path = img_path + '.rgb.jpg'
-                        rgb_img.save(temp_path, 'JPEG')
-                        processed_images.append(temp_path)
-                    else:
-                        processed_images.append(img_path)
-            
             # Create PDF
+            pages = list(cpu_pool().map(self._prepare_pdf_page, input_paths))
             with open(output_path, 'wb') as f:
-                f.write(img2pdf.convert(processed_images))
-            
-            # Clean up temporary files
-            for temp_img in processed_images:
-                if temp_img.endswith('.rgb.jpg'):
-                    os.remove(temp_img)
+                f.write(img2pdf.convert(pages))
             
             app_logger.info(f"Converted {len(input_paths)} images to PDF: {output_path}")
             return output_path
@@ -158,9 +302,10 @@ class FileConverter:
             ConversionError: If conversion fails
         """
         try:
-            cv = Converter(input_path)
-            cv.convert(output_path, start=0, end=None)
-            cv.close()
+            with _pymupdf_lock:
+                cv = Converter(input_path)
+                cv.convert(output_path, start=0, end=None)
+                cv.close()
             
             app_logger.info(f"Converted PDF to DOCX: {input_path} -> {output_path}")
             return output_path
@@ -169,6 +314,31 @@ class FileConverter:
             error_logger.error(f"PDF to DOCX conversion failed: {e}")
             raise ConversionError(f"PDF to DOCX conversion failed: {str(e)}")
     
+    def _render_pdf_pages(self, input_path: str, dpi: int) -> Iterator[Image.Image]:
+        """
+        Render PDF pages to RGB images.
+        
+        Uses PyMuPDF in-process when available, otherwise pdf2image/poppler.
+        The PyMuPDF lock is held until the generator is exhausted or closed.
+        
+        Args:
+            input_path: Input PDF path
+            dpi: Image DPI
+            
+        Yields:
+            One image per page, in page order
+        """
+        if pymupdf is None:
+            yield from convert_from_path(input_path, dpi=dpi, thread_count=os.cpu_count())
+            return
+        
+        with _pymupdf_lock, pymupdf.open(input_path) as doc:
+            for page in doc:
+                pix = page.get_pixmap(dpi=dpi, alpha=False)
+                yield Image.frombuffer(
+                    'RGB', (pix.width, pix.height), pix.samples, 'raw', 'RGB', pix.stride, 1
+                )
+    
     def convert_pdf_to_images(
         self,
         input_path: str,
@@ -192,23 +362,29 @@ class FileConverter:
             ConversionError: If conversion fails
         """
         try:
-            # Convert PDF to images
-            images = convert_from_path(input_path, dpi=dpi)
-            
-            output_paths = []
             base_name = Path(input_path).stem
             
-            for i, image in enumerate(images, start=1):
-                output_filename = f"{base_name}_page_{i}.{output_format}"
-                output_path = os.path.join(output_dir, output_filename)
-                
-                # Save image
+            def save_page(image: Image.Image, output_path: str) -> None:
                 if output_format.lower() in ['jpg', 'jpeg']:
-                    image.save(output_path, 'JPEG', quality=95, optimize=True)
+                    image.save(output_path, 'JPEG', quality=95, optimize=True, progressive=False)
+                elif output_format.lower() == 'png':
+                    # optimize re-runs zlib at level 9, which dominates encode time
+                    image.save(output_path, 'PNG', optimize=False, compress_level=1)
                 else:
                     image.save(output_path, output_format.upper(), optimize=True)
-                
-                output_paths.append(output_path)
+            
+            # Render pages and hand each to the pool to encode while the next renders
+            output_paths = []
+            futures = []
+            with closing(self._render_pdf_pages(input_path, dpi)) as pages:
+                for i, image in enumerate(pages, start=1):
+                    output_path = os.path.join(output_dir, f"{base_name}_page_{i}.{output_format}")
+                    futures.append(cpu_pool().submit(save_page, image, output_path))
+                    output_paths.append(output_path)
+            
+            # Re-raise the first save failure
+            for future in futures:
+                future.result()
             
             app_logger.info(f"Converted PDF to {len(output_paths)} images: {input_path}")
             return output_paths
@@ -236,51 +412,115 @@ class FileConverter:
             ConversionError: If conversion fails
         """
         try:
-            # Get output directory
-            output_dir = os.path.dirname(output_path)
+            converted = self.convert_docx_batch_to_pdf([input_path], [output_path])
+            
+            if input_path not in converted:
+                raise ConversionError("LibreOffice did not create output file")
+            
+            app_logger.info(f"Converted DOCX to PDF: {input_path} -> {output_path}")
+            return output_path
+            
+        except ConversionError:
+            raise
+        except Exception as e:
+            error_logger.error(f"DOCX to PDF conversion failed: {e}")
+            raise ConversionError(f"DOCX to PDF conversion failed: {str(e)}")
+    
+    def convert_docx_batch_to_pdf(
+        self,
+        input_paths: List[str],
+        output_paths: List[str]
+    ) -> Dict[str, str]:
+        """
+        Convert several DOCX files to PDF with a single LibreOffice run.
+        
+        LibreOffice startup dominates the cost of small documents, so all
+        inputs go to one soffice invocation. Each worker process keeps its
+        own LibreOffice profile so processes never block on each other's
+        instance; threads within a process take turns via a lock.
+        
+        Args:
+            input_paths: Input DOCX paths, with distinct file names
+            output_paths: Output PDF paths in one directory, in input order
+            
+        Returns:
+            Dict mapping each converted input path to its output path;
+            inputs LibreOffice could not convert are left out
+            
+        Raises:
+            ConversionError: If LibreOffice cannot be run, fails or times out
+        """
+        try:
+            output_dir = os.path.dirname(output_paths[0])
+            profile_url = Path(self.libreoffice_profile_dir()).as_uri()
             
             # Run LibreOffice in headless mode
             cmd = [
                 self.libreoffice_path,
+                f'-env:UserInstallation={profile_url}',
                 '--headless',
                 '--convert-to', 'pdf',
                 '--outdir', output_dir,
-                input_path
+                *input_paths
             ]
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=60  # 60 second timeout
-            )
+            with self._libreoffice_lock:
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    timeout=60 * len(input_paths)  # 60 seconds per file
+                )
+            
+            converted = {}
+            for input_path, output_path in zip(input_paths, output_paths):
+                # LibreOffice creates file with same name but .pdf extension
+                expected_output = os.path.join(
+                    output_dir,
+                    Path(input_path).stem + '.pdf'
+                )
+                
+                # Rename if needed
+                if expected_output != output_path and os.path.exists(expected_output):
+                    os.rename(expected_output, output_path)
+                
+                if os.path.exists(output_path):
+                    converted[input_path] = output_path
             
-            if result.returncode != 0:
+            if result.returncode != 0 and not converted:
+                error_logger.error(f"LibreOffice conversion failed: {result.stderr}")
                 raise ConversionError(f"LibreOffice conversion failed: {result.stderr}")
             
-            # LibreOffice creates file with same name but .pdf extension
-            expected_output = os.path.join(
-                output_dir,
-                Path(input_path).stem + '.pdf'
-            )
-            
-            # Rename if needed
-            if expected_output != output_path and os.path.exists(expected_output):
-                os.rename(expected_output, output_path)
-            
-            if not os.path.exists(output_path):
-                raise ConversionError("LibreOffice did not create output file")
-            
-            app_logger.info(f"Converted DOCX to PDF: {input_path} -> {output_path}")
-            return output_path
+            if len(input_paths) > 1:
+                app_logger.info(
+                    f"Converted {len(converted)}/{len(input_paths)} DOCX files to PDF in one LibreOffice run"
+                )
+            return converted
             
         except subprocess.TimeoutExpired:
             error_logger.error("DOCX to PDF conversion timed out")
             raise ConversionError("Conversion timed out (file too large or complex)")
+        except ConversionError:
+            raise
         except Exception as e:
+            # e.g. soffice missing or an output rename failing
             error_logger.error(f"DOCX to PDF conversion failed: {e}")
             raise ConversionError(f"DOCX to PDF conversion failed: {str(e)}")
     
+    @staticmethod
+    def libreoffice_profile_dir() -> str:
+        """
+        Get this process's LibreOffice user profile directory.
+        
+        Returns:
+            Profile directory path
+        """
+        return os.path.join(settings.TEMP_DIR, f"libreoffice_{os.getpid()}")
+    
+    def remove_libreoffice_profile(self) -> None:
+        """Delete this process's LibreOffice profile (called on worker exit)."""
+        shutil.rmtree(self.libreoffice_profile_dir(), ignore_errors=True)
+    
     def convert_file(
         self,
         input_path: str,
@@ -306,46 +546,69 @@ class FileConverter:
         source_format = source_format.lower()
         target_format = target_format.lower()
         
-        # Image conversions
-        if source_format in ['jpg', 'jpeg', 'png', 'webp']:
-            if target_format in ['jpg', 'jpeg', 'png', 'webp']:
-                return self.convert_image(input_path, output_path, target_format)
-            elif target_format == 'pdf':
-                return self.convert_images_to_pdf([input_path], output_path)
+        handler = self._dispatch.get((source_format, target_format))
+        if handler is None:
+            raise ConversionError(f"Unsupported conversion: {source_format} -> {target_format}")
         
-        # PDF conversions
-        elif source_format == 'pdf':
-            if target_format == 'docx':
-                return self.convert_pdf_to_docx(input_path, output_path)
-            elif target_format in ['jpg', 'jpeg', 'png']:
-                # Convert to images and return first page
-                output_dir = os.path.dirname(output_path)
-                images = self.convert_pdf_to_images(input_path, output_dir, target_format)
-                return images[0] if images else None
+        return handler(input_path, output_path)
+    
+    @staticmethod
+    def _add_to_zip(zipf: zipfile.ZipFile, info: zipfile.ZipInfo, file_path: str) -> None:
+        """
+        Add one file to a ZIP archive.
         
-        # DOCX conversions
-        elif source_format == 'docx':
-            if target_format == 'pdf':
-                return self.convert_docx_to_pdf(input_path, output_path)
+        Already-compressed formats are stored as-is; anything else is
+        deflated at the fastest level. Either way the pre-sized entry is
+        streamed in large blocks.
         
-        raise ConversionError(f"Unsupported conversion: {source_format} -> {target_format}")
+        Args:
+            zipf: Open ZIP archive
+            info: Entry info built with ZipInfo.from_file
+            file_path: File to add
+        """
+        if get_file_extension(info.filename) in STORED_EXTENSIONS:
+            info.compress_type = zipfile.ZIP_STORED
+        else:
+            info.compress_type = zipfile.ZIP_DEFLATED
+            setattr(info, ZIPINFO_LEVEL_ATTR, 1)
+        
+        with open(file_path, 'rb', buffering=ZIP_BUFFER_SIZE) as src, zipf.open(info, 'w') as dest:
+            shutil.copyfileobj(src, dest, ZIP_BUFFER_SIZE)
     
-    def create_zip_archive(self, file_paths: List[str], zip_path: str) -> str:
+    def create_zip_archive(
+        self,
+        file_paths: List[str],
+        zip_path: str,
+        remove_sources: bool = False,
+    ) -> str:
         """
         Create ZIP archive from multiple files.
         
         Args:
             file_paths: List of file paths to include
             zip_path: Output ZIP path
+            remove_sources: Delete each file as soon as it has been added,
+                so the inputs and the archive are never all on disk at once
             
         Returns:
             ZIP file path
         """
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in file_paths:
-                    if os.path.exists(file_path):
-                        zipf.write(file_path, os.path.basename(file_path))
+            entries = [
+                (zipfile.ZipInfo.from_file(file_path, os.path.basename(file_path)), file_path)
+                for file_path in file_paths
+                if os.path.exists(file_path)
+            ]
+            
+            # Largest first, so small files are still in the page cache at the end
+            entries.sort(key=lambda entry: entry[0].file_size, reverse=True)
+            
+            with open(zip_path, 'wb', buffering=ZIP_BUFFER_SIZE) as f, \
+                    zipfile.ZipFile(f, 'w', allowZip64=True) as zipf:
+                for info, file_path in entries:
+                    self._add_to_zip(zipf, info, file_path)
+                    if remove_sources:
+                        os.unlink(file_path)
             
             app_logger.info(f"Created ZIP archive with {len(file_paths)} files: {zip_path}")
             return zip_path
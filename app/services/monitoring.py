@@ -0,0 +1,53 @@
+"""
+Monitoring services for FileConverter Pro.
+Wraps Celery inspect calls in short-lived caches, so dashboards and
+health polls don't hit every worker on each request. Storage usage is
+cached by the storage providers themselves.
+"""
+from typing import Dict, Any
+
+from app.config import settings
+from app.services.storage import storage
+from app.utils.cache import ttl_cache
+from app.utils.concurrency import io_pool
+from app.workers.celery_app import celery_app
+
+# Seconds to reuse worker inspect replies
+INSPECT_CACHE_TTL = 2.0
+
+# Inspect commands shown on the admin dashboard
+OVERVIEW_COMMANDS = ("active", "scheduled", "reserved", "registered", "stats")
+
+
+def _get_inspector():
+    """Get a Celery inspector with a short reply timeout."""
+    return celery_app.control.inspect(timeout=settings.CELERY_INSPECT_TIMEOUT)
+
+
+@ttl_cache(INSPECT_CACHE_TTL)
+def get_active_tasks() -> Dict[str, list]:
+    """Get currently executing tasks, keyed by worker name."""
+    return _get_inspector().active() or {}
+
+
+@ttl_cache(INSPECT_CACHE_TTL)
+def get_cluster_overview() -> Dict[str, Dict[str, Any]]:
+    """
+    Run the admin dashboard inspect commands concurrently.
+    
+    Each command is a separate broadcast that waits for worker replies,
+    so running them in parallel costs one timeout instead of five.
+    
+    Returns:
+        Dict mapping command name to its replies, keyed by worker name
+    """
+    def run_command(command: str) -> Dict[str, Any]:
+        return getattr(_get_inspector(), command)() or {}
+    
+    replies = io_pool().map(run_command, OVERVIEW_COMMANDS)
+    return dict(zip(OVERVIEW_COMMANDS, replies))
+
+
+def get_storage_usage() -> Dict[str, Any]:
+    """Get storage usage statistics (cached and invalidated by the storage provider)."""
+    return storage.get_storage_usage()
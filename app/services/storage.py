@@ -2,16 +2,42 @@
 Storage abstraction layer for FileConverter Pro.
 Supports local temporary storage and AWS S3.
 """
+import mimetypes
 import os
+import shutil
+import threading
+import time
 from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 import boto3
-from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
 
 from app.config import settings
+from app.utils.cache import ttl_cache
+from app.utils.concurrency import io_pool
 from app.utils.logger import app_logger
-from app.utils.file_utils import get_directory_size, format_file_size
+from app.utils.file_utils import get_directory_stats, format_file_size
+
+try:
+    from watchdog.observers import Observer
+except ImportError:  # Optional, usage is then cached for a short TTL only
+    Observer = None
+
+
+# Seconds to reuse local usage without a directory watcher
+LOCAL_USAGE_CACHE_TTL = 10.0
+
+# Upper bound on local usage age with a watcher, in case events are missed
+LOCAL_USAGE_MAX_AGE = 300.0
+
+# Seconds to reuse S3 usage (CloudWatch metrics are daily anyway)
+S3_USAGE_CACHE_TTL = 60.0
+
+# Files below this size are uploaded with a single put_object
+S3_SINGLE_PUT_MAX_SIZE = 5 * 1024 * 1024
 
 
 class StorageProvider(ABC):
@@ -43,6 +69,16 @@ class StorageProvider(ABC):
         pass
 
 
+class _ChangeHandler:
+    """Minimal watchdog event handler that flags any change."""
+    
+    def __init__(self, changed: threading.Event):
+        self.changed = changed
+    
+    def dispatch(self, event) -> None:
+        self.changed.set()
+
+
 class LocalTempStorage(StorageProvider):
     """Local temporary storage provider."""
     
@@ -55,6 +91,13 @@ class LocalTempStorage(StorageProvider):
         os.makedirs(self.input_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # Cached usage stats, invalidated by the directory watcher
+        self._usage: Optional[Dict[str, any]] = None
+        self._usage_time = 0.0
+        self._changed = threading.Event()
+        self._watch_pid: Optional[int] = None
+        self._watching = False
+        
         app_logger.info("Initialized LocalTempStorage")
     
     def upload_file(self, local_path: str, storage_key: str) -> str:
@@ -74,9 +117,15 @@ class LocalTempStorage(StorageProvider):
         if os.path.abspath(local_path) == os.path.abspath(dest_path):
             return dest_path
         
-        # Copy file
-        import shutil
-        shutil.copy2(local_path, dest_path)
+        try:
+            # Same filesystem: hard link, no data copied and the source stays put
+            os.link(local_path, dest_path)
+        except OSError:
+            # Cross-device or unsupported: kernel-side copy (sendfile on Linux)
+            if settings.PRESERVE_METADATA:
+                shutil.copy2(local_path, dest_path)
+            else:
+                shutil.copyfile(local_path, dest_path)
         
         app_logger.debug(f"Uploaded file to local storage: {storage_key}")
         return dest_path
@@ -142,18 +191,31 @@ class LocalTempStorage(StorageProvider):
         """
         Get storage usage statistics.
         
+        The result is cached until a filesystem watcher reports a change in
+        the storage directories (or LOCAL_USAGE_MAX_AGE passes). Without
+        watchdog it is cached for LOCAL_USAGE_CACHE_TTL.
+        
         Returns:
             Dict with usage stats
         """
-        input_size = get_directory_size(self.input_dir)
-        output_size = get_directory_size(self.output_dir)
-        total_size = input_size + output_size
+        max_age = LOCAL_USAGE_MAX_AGE if self._watch_directories() else LOCAL_USAGE_CACHE_TTL
+        now = time.monotonic()
+        
+        if (
+            self._usage is not None
+            and not self._changed.is_set()
+            and now - self._usage_time < max_age
+        ):
+            return self._usage
         
-        # Count files
-        input_files = len([f for f in os.listdir(self.input_dir) if os.path.isfile(os.path.join(self.input_dir, f))]) if os.path.exists(self.input_dir) else 0
-        output_files = len([f for f in os.listdir(self.output_dir) if os.path.isfile(os.path.join(self.output_dir, f))]) if os.path.exists(self.output_dir) else 0
+        # Clear first so changes made during the scan invalidate it again
+        self._changed.clear()
+        
+        input_files, input_size = get_directory_stats(self.input_dir)
+        output_files, output_size = get_directory_stats(self.output_dir)
+        total_size = input_size + output_size
         
-        return {
+        self._usage = {
             "input_size_bytes": input_size,
             "output_size_bytes": output_size,
             "total_size_bytes": total_size,
@@ -164,6 +226,41 @@ class LocalTempStorage(StorageProvider):
             "output_files": output_files,
             "total_files": input_files + output_files,
         }
+        self._usage_time = now
+        return self._usage
+    
+    def _watch_directories(self) -> bool:
+        """
+        Start watching the storage directories in the current process.
+        
+        Started on first use rather than in __init__, because the watcher
+        thread would not survive the fork into Celery worker processes.
+        
+        Returns:
+            True if changes are being watched
+        """
+        pid = os.getpid()
+        if self._watch_pid == pid:
+            return self._watching
+        
+        self._watch_pid = pid
+        self._watching = False
+        
+        if Observer is None:
+            return False
+        
+        try:
+            observer = Observer()
+            handler = _ChangeHandler(self._changed)
+            for directory in (self.input_dir, self.output_dir):
+                observer.schedule(handler, directory, recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._watching = True
+        except Exception as e:
+            app_logger.warning(f"Storage watcher unavailable, using TTL cache: {e}")
+        
+        return self._watching
 
 
 class S3Storage(StorageProvider):
@@ -171,21 +268,38 @@ class S3Storage(StorageProvider):
     
     def __init__(self):
         """Initialize S3 storage."""
+        cloud = settings.cloud
+        
         if not all([
-            settings.AWS_ACCESS_KEY_ID,
-            settings.AWS_SECRET_ACCESS_KEY,
-            settings.AWS_S3_BUCKET
+            cloud.AWS_ACCESS_KEY_ID,
+            cloud.AWS_SECRET_ACCESS_KEY,
+            cloud.AWS_S3_BUCKET
         ]):
             raise ValueError("S3 credentials not configured")
         
         self.s3_client = boto3.client(
             's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION
+            aws_access_key_id=cloud.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=cloud.AWS_SECRET_ACCESS_KEY,
+            region_name=cloud.AWS_S3_REGION
+        )
+        
+        self.cloudwatch_client = boto3.client(
+            'cloudwatch',
+            aws_access_key_id=cloud.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=cloud.AWS_SECRET_ACCESS_KEY,
+            region_name=cloud.AWS_S3_REGION
+        )
+        
+        # Upload large files in parallel 16 MB parts
+        self._transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=16 * 1024 * 1024,
+            max_concurrency=16,
+            use_threads=True
         )
         
-        self.bucket = settings.AWS_S3_BUCKET
+        self.bucket = cloud.AWS_S3_BUCKET
         app_logger.info(f"Initialized S3Storage with bucket: {self.bucket}")
     
     def upload_file(self, local_path: str, storage_key: str) -> str:
@@ -200,7 +314,27 @@ class S3Storage(StorageProvider):
             S3 URL
         """
         try:
-            self.s3_client.upload_file(local_path, self.bucket, storage_key)
+            content_type = mimetypes.guess_type(storage_key)[0]
+            extra_args = {'ContentType': content_type} if content_type else {}
+            
+            if os.path.getsize(local_path) < S3_SINGLE_PUT_MAX_SIZE:
+                # Small files: one PUT, no transfer manager overhead
+                with open(local_path, 'rb') as f:
+                    self.s3_client.put_object(
+                        Bucket=self.bucket,
+                        Key=storage_key,
+                        Body=f,
+                        **extra_args
+                    )
+            else:
+                self.s3_client.upload_file(
+                    local_path,
+                    self.bucket,
+                    storage_key,
+                    ExtraArgs=extra_args,
+                    Config=self._transfer_config
+                )
+            
             app_logger.info(f"Uploaded file to S3: {storage_key}")
             return f"s3://{self.bucket}/{storage_key}"
         except ClientError as e:
@@ -259,25 +393,26 @@ class S3Storage(StorageProvider):
             app_logger.error(f"Error deleting from S3: {e}")
             return False
     
+    @ttl_cache(S3_USAGE_CACHE_TTL, maxsize=1)
     def get_storage_usage(self) -> Dict[str, any]:
         """
         Get S3 bucket usage statistics.
         
+        Reads the daily CloudWatch bucket metrics (one API call) and only
+        falls back to listing the bucket when no datapoints exist yet,
+        e.g. for buckets younger than a day.
+        
         Returns:
             Dict with usage stats
         """
-        # Note: This is a simplified version. For production,
-        # consider using CloudWatch metrics for better performance
         try:
-            total_size = 0
-            object_count = 0
-            
-            paginator = self.s3_client.get_paginator('list_objects_v2')
-            for page in paginator.paginate(Bucket=self.bucket):
-                if 'Contents' in page:
-                    for obj in page['Contents']:
-                        total_size += obj['Size']
-                        object_count += 1
+            usage = self._get_cloudwatch_usage()
+        except (BotoCoreError, ClientError) as e:
+            app_logger.warning(f"CloudWatch S3 metrics unavailable, listing bucket: {e}")
+            usage = None
+        
+        try:
+            total_size, object_count = usage or self._list_bucket_usage()
             
             return {
                 "total_size_bytes": total_size,
@@ -287,6 +422,93 @@ class S3Storage(StorageProvider):
         except ClientError as e:
             app_logger.error(f"Error getting S3 usage: {e}")
             return {"error": str(e)}
+    
+    def _get_cloudwatch_usage(self) -> Optional[Tuple[int, int]]:
+        """
+        Get bucket size and object count from CloudWatch storage metrics.
+        
+        Returns:
+            Tuple of (total bytes, object count), or None without datapoints
+        """
+        def bucket_metric(query_id: str, metric_name: str, storage_type: str) -> Dict[str, any]:
+            return {
+                'Id': query_id,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': 'AWS/S3',
+                        'MetricName': metric_name,
+                        'Dimensions': [
+                            {'Name': 'BucketName', 'Value': self.bucket},
+                            {'Name': 'StorageType', 'Value': storage_type},
+                        ],
+                    },
+                    'Period': 86400,
+                    'Stat': 'Average',
+                },
+            }
+        
+        now = datetime.now(timezone.utc)
+        response = self.cloudwatch_client.get_metric_data(
+            MetricDataQueries=[
+                bucket_metric('size', 'BucketSizeBytes', 'StandardStorage'),
+                bucket_metric('count', 'NumberOfObjects', 'AllStorageTypes'),
+            ],
+            StartTime=now - timedelta(days=2),
+            EndTime=now,
+            ScanBy='TimestampDescending',
+        )
+        
+        values = {result['Id']: result['Values'] for result in response['MetricDataResults']}
+        if not values.get('size') or not values.get('count'):
+            return None
+        return int(values['size'][0]), int(values['count'][0])
+    
+    def _list_bucket_usage(self) -> Tuple[int, int]:
+        """
+        Sum object sizes by listing the bucket, top-level prefixes in parallel.
+        
+        Returns:
+            Tuple of (total bytes, object count)
+        """
+        total_size, object_count, prefixes = self._list_prefix_usage('', delimiter='/')
+        
+        for size, count, _ in io_pool().map(self._list_prefix_usage, prefixes):
+            total_size += size
+            object_count += count
+        
+        return total_size, object_count
+    
+    def _list_prefix_usage(
+        self,
+        prefix: str,
+        delimiter: Optional[str] = None
+    ) -> Tuple[int, int, List[str]]:
+        """
+        Sum object sizes under a prefix.
+        
+        Args:
+            prefix: Key prefix to list
+            delimiter: Optional delimiter to stop at sub-prefixes
+            
+        Returns:
+            Tuple of (total bytes, object count, common sub-prefixes)
+        """
+        total_size = 0
+        object_count = 0
+        prefixes = []
+        
+        params = {'Bucket': self.bucket, 'Prefix': prefix}
+        if delimiter:
+            params['Delimiter'] = delimiter
+        
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(**params):
+            for obj in page.get('Contents', ()):
+                total_size += obj['Size']
+                object_count += 1
+            prefixes.extend(common['Prefix'] for common in page.get('CommonPrefixes', ()))
+        
+        return total_size, object_count, prefixes
 
 
 def get_storage_provider() -> StorageProvider:
@@ -0,0 +1,84 @@
+"""
+Caching utilities for FileConverter Pro.
+Provides a small time-based memoization decorator and a size-bounded LRU mapping.
+"""
+import time
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple
+
+
+def ttl_cache(ttl: float, maxsize: int = 128) -> Callable:
+    """
+    Memoize function results for a limited time.
+    
+    Results are keyed on the call arguments. Exceptions are not cached.
+    
+    Args:
+        ttl: Time to live in seconds
+        maxsize: Maximum number of cached entries
+        
+    Returns:
+        Function decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        cache: Dict[Tuple, Tuple[Any, float]] = {}
+        lock = threading.Lock()
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            
+            entry = cache.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+            
+            value = func(*args, **kwargs)
+            now = time.monotonic()
+            
+            with lock:
+                if len(cache) >= maxsize:
+                    # Drop expired entries first, then the oldest one
+                    for expired_key in [k for k, (_, expires) in cache.items() if expires <= now]:
+                        del cache[expired_key]
+                    if len(cache) >= maxsize:
+                        cache.pop(next(iter(cache)))
+                
+                cache[key] = (value, now + ttl)
+            
+            return value
+        
+        def cache_clear() -> None:
+            """Clear all cached results."""
+            with lock:
+                cache.clear()
+        
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    
+    return decorator
+
+
+class BoundedLRU(OrderedDict):
+    """
+    Mapping that holds at most maxsize entries.
+    
+    Reads and writes mark an entry as most recently used; inserting past
+    the limit evicts the least recently used entry.
+    """
+    
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+    
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
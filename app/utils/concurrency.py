@@ -0,0 +1,58 @@
+"""
+Shared thread pools for FileConverter Pro.
+Pools are created on first use in each process and reused afterwards,
+so threads stay warm across conversions.
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+# Threads for I/O-bound work (S3 calls, worker broadcasts)
+IO_POOL_SIZE = 32
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """
+    Get a named pool, creating it on first use.
+    
+    Args:
+        name: Pool name, also used as the thread name prefix
+        max_workers: Number of threads if the pool is created
+        
+    Returns:
+        Shared thread pool
+    """
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"fc-{name}")
+                atexit.register(pool.shutdown, wait=False)
+                _pools[name] = pool
+    return pool
+
+
+def cpu_pool() -> ThreadPoolExecutor:
+    """Get the pool for CPU-bound work that releases the GIL (Pillow, img2pdf, zlib)."""
+    return _get_pool("cpu", max(4, os.cpu_count() or 4))
+
+
+def io_pool() -> ThreadPoolExecutor:
+    """Get the pool for I/O-bound work, kept apart so it never waits on conversions."""
+    return _get_pool("io", IO_POOL_SIZE)
+
+
+def _reset_after_fork() -> None:
+    """Drop pools inherited from the parent; their threads do not survive fork."""
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -3,63 +3,99 @@ File utility functions for FileConverter Pro.
 Handles file operations, sanitization, and cleanup.
 """
 import os
-import re
 import hashlib
-import uuid
+import mmap
+import secrets
+import time
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Iterator, Optional, List, Tuple
 
 from app.config import settings
 from app.utils.logger import app_logger
 
+try:
+    import blake3
+except ImportError:  # Optional, only used when CHECKSUM_ALGORITHM is "blake3"
+    blake3 = None
 
-def sanitize_filename(filename: str) -> str:
+
+class _SanitizeTable(dict):
+    """
+    str.translate table that deletes everything except word characters,
+    whitespace, hyphens and dots.
+    
+    Latin-1 is filled in up front; other code points are resolved on first
+    use, so the table never has to cover all of Unicode.
     """
-    Sanitize filename to prevent security issues.
+    
+    MAX_SIZE = 4096
+    
+    def __init__(self):
+        super().__init__()
+        for codepoint in range(256):
+            self[codepoint] = self.__missing__(codepoint)
+    
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char.isspace() or char in '_-.' else None
+        if len(self) < self.MAX_SIZE:
+            self[codepoint] = value
+        return value
+
+
+_SANITIZE_TABLE = _SanitizeTable()
+
+
+def _sanitize_parts(filename: str) -> Tuple[str, str]:
+    """
+    Sanitize a filename and split it into name and extension.
     
     Args:
         filename: Original filename
         
     Returns:
-        Sanitized filename
+        Tuple of (sanitized name, extension including the dot)
     """
-    # Remove path components
-    filename = os.path.basename(filename)
-    
-    # Remove dangerous characters
-    filename = re.sub(r'[^\w\s\-\.]', '', filename)
+    # Remove path components and dangerous characters
+    filename = os.path.basename(filename).translate(_SANITIZE_TABLE)
     
     # Remove multiple dots (except extension)
     name, ext = os.path.splitext(filename)
     name = name.replace('.', '_')
     
-    # Limit length
-    max_length = 200
-    if len(name) > max_length:
-        name = name[:max_length]
-    
-    # Ensure not empty
-    if not name:
-        name = "file"
+    # Limit length, ensure not empty
+    return name[:200] or "file", ext
+
+
+def sanitize_filename(filename: str) -> str:
+    """
+    Sanitize filename to prevent security issues.
     
+    Args:
+        filename: Original filename
+        
+    Returns:
+        Sanitized filename
+    """
+    name, ext = _sanitize_parts(filename)
     return f"{name}{ext}"
 
 
 def generate_unique_filename(original_filename: str) -> str:
     """
-    Generate a unique filename using UUID.
+    Generate a unique filename with a random prefix.
+    
+    The prefix is 12 hex characters (48 bits) straight from os.urandom,
+    the same keyspace as the previous truncated UUID4.
     
     Args:
         original_filename: Original filename
         
     Returns:
-        Unique filename with UUID prefix
+        Unique filename with random prefix
     """
-    sanitized = sanitize_filename(original_filename)
-    name, ext = os.path.splitext(sanitized)
-    unique_id = uuid.uuid4().hex[:12]
-    return f"{unique_id}_{name}{ext}"
+    name, ext = _sanitize_parts(original_filename)
+    return f"{secrets.token_hex(6)}_{name}{ext}"
 
 
 def get_file_extension(filename: str) -> str:
@@ -78,22 +114,34 @@ def get_file_extension(filename: str) -> str:
 
 def calculate_checksum(file_path: str) -> str:
     """
-    Calculate SHA256 checksum of file.
+    Calculate checksum of file.
+    
+    SHA256 by default; BLAKE3 when CHECKSUM_ALGORITHM is "blake3" and the
+    blake3 package is installed.
     
     Args:
         file_path: Path to file
         
     Returns:
-        Hex digest of SHA256 hash
+        Hex digest of the file hash
     """
-    sha256_hash = hashlib.sha256()
+    if settings.CHECKSUM_ALGORITHM == "blake3" and blake3 is not None:
+        hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        hasher.update_mmap(file_path)
+        return hasher.hexdigest()
     
-    with open(file_path, "rb") as f:
-        # Read in chunks to handle large files
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    
-    return sha256_hash.hexdigest()
+    with open(file_path, "rb", buffering=0) as f:
+        try:
+            # Hash the mapping in one call, no per-block allocations
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                sha256_hash = hashlib.sha256()
+                sha256_hash.update(mm)
+                return sha256_hash.hexdigest()
+        except (ValueError, OSError):
+            # Empty files (and some filesystems) cannot be mapped
+            return hashlib.file_digest(f, "sha256").hexdigest()
 
 
 def get_file_size(file_path: str) -> int:
@@ -109,43 +157,93 @@ def get_file_size(file_path: str) -> int:
     return os.path.getsize(file_path)
 
 
-def cleanup_old_files(directory: str, max_age_minutes: int = None) -> int:
+def _iter_files(root: str) -> Iterator[Tuple[str, os.stat_result]]:
     """
-    Delete files older than specified age.
+    Recursively yield regular files under a directory with their stat.
+    
+    Uses os.scandir so file type checks come free from readdir and each
+    file costs a single stat() call.
+    
+    Args:
+        root: Directory to walk
+        
+    Yields:
+        Tuples of (file path, stat result)
+    """
+    stack = [root]
+    
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            # Skip missing or unreadable directories, as os.walk does
+            continue
+        
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat(follow_symlinks=False)
+
+
+# Log cleanup progress every N deletions rather than per file
+CLEANUP_LOG_INTERVAL = 1000
+
+
+def retention_cutoff(max_age_minutes: Optional[int] = None) -> float:
+    """
+    Compute the modification-time cutoff for file retention.
     
     Args:
-        directory: Directory to clean
         max_age_minutes: Maximum file age in minutes (default from settings)
         
     Returns:
-        Number of files deleted
+        Unix timestamp; files last modified before it are expired
     """
     if max_age_minutes is None:
         max_age_minutes = settings.FILE_RETENTION_MINUTES
     
+    return time.time() - max_age_minutes * 60.0
+
+
+def cleanup_old_files(
+    directory: str,
+    max_age_minutes: Optional[int] = None,
+    cutoff_ts: Optional[float] = None,
+) -> int:
+    """
+    Delete files older than specified age.
+    
+    Args:
+        directory: Directory to clean
+        max_age_minutes: Maximum file age in minutes (default from settings)
+        cutoff_ts: Precomputed cutoff from retention_cutoff(); takes
+            precedence over max_age_minutes so several directories can
+            share one cutoff
+        
+    Returns:
+        Number of files deleted
+    """
     if not os.path.exists(directory):
         return 0
     
-    current_time = datetime.now()
-    cutoff_time = current_time - timedelta(minutes=max_age_minutes)
+    if cutoff_ts is None:
+        cutoff_ts = retention_cutoff(max_age_minutes)
+    
     deleted_count = 0
     
     try:
-        for root, dirs, files in os.walk(directory):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                
-                try:
-                    # Get file modification time
-                    mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
+        for file_path, stat_result in _iter_files(directory):
+            try:
+                if stat_result.st_mtime < cutoff_ts:
+                    os.unlink(file_path)
+                    deleted_count += 1
+                    if deleted_count % CLEANUP_LOG_INTERVAL == 0:
+                        app_logger.debug(f"Deleted {deleted_count} old files so far from {directory}")
                     
-                    if mtime < cutoff_time:
-                        os.remove(file_path)
-                        deleted_count += 1
-                        app_logger.debug(f"Deleted old file: {file_path}")
-                        
-                except Exception as e:
-                    app_logger.error(f"Error deleting file {file_path}: {e}")
+            except Exception as e:
+                app_logger.error(f"Error deleting file {file_path}: {e}")
         
         app_logger.info(f"Cleanup completed: {deleted_count} files deleted from {directory}")
         
@@ -176,28 +274,43 @@ def secure_delete_file(file_path: str) -> bool:
         return False
 
 
-def get_directory_size(directory: str) -> int:
+def get_directory_stats(directory: str) -> Tuple[int, int]:
     """
-    Calculate total size of directory in bytes.
+    Count files and total their size in one pass over a directory.
     
     Args:
         directory: Directory path
         
     Returns:
-        Total size in bytes
+        Tuple of (file count, total size in bytes)
     """
+    file_count = 0
     total_size = 0
     
     try:
-        for root, dirs, files in os.walk(directory):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                if os.path.exists(file_path):
-                    total_size += os.path.getsize(file_path)
+        for _, stat_result in _iter_files(directory):
+            file_count += 1
+            total_size += stat_result.st_size
     except Exception as e:
-        app_logger.error(f"Error calculating directory size for {directory}: {e}")
+        app_logger.error(f"Error scanning directory {directory}: {e}")
     
-    return total_size
+    return file_count, total_size
+
+
+def get_directory_size(directory: str) -> int:
+    """
+    Calculate total size of directory in bytes.
+    
+    Args:
+        directory: Directory path
+        
+    Returns:
+        Total size in bytes
+    """
+    return get_directory_stats(directory)[1]
+
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
 
 
 def format_file_size(size_bytes: int) -> str:
@@ -210,11 +323,12 @@ def format_file_size(size_bytes: int) -> str:
     Returns:
         Formatted size string
     """
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.2f} PB"
+    if size_bytes < 1024:
+        return f"{size_bytes:.2f} B"
+    
+    # Each unit is 10 more bits, so the bit length picks the unit directly
+    exponent = min((int(size_bytes).bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (exponent * 10)):.2f} {SIZE_UNITS[exponent]}"
 
 
 def ensure_directory(directory: str) -> None:
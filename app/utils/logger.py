@@ -2,30 +2,65 @@
 Logging configuration for FileConverter Pro.
 Provides structured logging with file and console handlers.
 """
+import atexit
+import copy
 import logging
+import os
+import queue
 import sys
 import json
+import socket
+import time
 from pathlib import Path
-from datetime import datetime
 from typing import Optional
-from logging.handlers import RotatingFileHandler
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
 
 from app.config import settings
 
+try:
+    import orjson
+except ImportError:  # Optional, falls back to the stdlib encoder
+    orjson = None
+
 
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging."""
     
+    # Optional record attributes copied into the output, as (attribute, JSON key)
+    EXTRA_FIELDS = (
+        ("task_id", "task_id"),
+        ("duration", "duration_ms"),
+        ("user_ip", "user_ip"),
+    )
+    
+    def __init__(self):
+        super().__init__()
+        
+        # Fields that never change for the lifetime of the process
+        self.hostname = socket.gethostname()
+        self.encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+    
+    def serialize(self, log_data: dict) -> str:
+        """Serialize a log entry to compact JSON, with orjson when installed."""
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str).decode()
+        return self.encoder.encode(log_data)
+    
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON."""
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": "%s.%03dZ" % (
+                time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)),
+                record.msecs,
+            ),
             "level": record.levelname,
             "logger": record.name,
-            "message": record.getMessage(),
+            "message": record.getMessage() if record.args else str(record.msg),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno,
+            "hostname": self.hostname,
+            "process": record.process,
         }
         
         # Add exception info if present
@@ -33,14 +68,12 @@ class JSONFormatter(logging.Formatter):
             log_data["exception"] = self.formatException(record.exc_info)
         
         # Add extra fields
-        if hasattr(record, "task_id"):
-            log_data["task_id"] = record.task_id
-        if hasattr(record, "duration"):
-            log_data["duration_ms"] = record.duration
-        if hasattr(record, "user_ip"):
-            log_data["user_ip"] = record.user_ip
+        record_dict = record.__dict__
+        for attr, key in self.EXTRA_FIELDS:
+            if attr in record_dict:
+                log_data[key] = record_dict[attr]
             
-        return json.dumps(log_data)
+        return self.serialize(log_data)
 
 
 class TextFormatter(logging.Formatter):
@@ -53,13 +86,126 @@ class TextFormatter(logging.Formatter):
         )
 
 
+class _QueueHandler(QueueHandler):
+    """QueueHandler that keeps exc_info so the listener formats tracebacks itself."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args into the message, leaving exception info to the real handlers."""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+# Resolved once, since every logger shares the same format
+JSON_LOG_FORMAT = settings.LOG_FORMAT == "json"
+
+
+def build_formatter() -> logging.Formatter:
+    """Build the formatter selected by LOG_FORMAT."""
+    return JSONFormatter() if JSON_LOG_FORMAT else TextFormatter()
+
+
+def _build_console_handler() -> logging.Handler:
+    """Build the console handler shared by every logger."""
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+    console_handler.setFormatter(build_formatter())
+    return console_handler
+
+
+# Records each file handler buffers before writing them out together
+LOG_BUFFER_CAPACITY = 512
+
+# Records are queued by the calling thread and written by a background listener,
+# so request handlers and tasks never wait on formatting or disk I/O
+log_queue: queue.Queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, _build_console_handler(), respect_handler_level=True)
+log_listener.start()
+
+
+# Whether the listener was running when the current fork started
+_listener_paused_for_fork = False
+
+
+def _pause_listener_before_fork() -> None:
+    """
+    Stop the listener thread before fork.
+    
+    If the thread were mid-write when the process forks, the child would
+    inherit stdout and log file buffer locks that nobody ever releases,
+    and its first log write would hang.
+    """
+    global _listener_paused_for_fork
+    
+    _listener_paused_for_fork = log_listener._thread is not None
+    if _listener_paused_for_fork:
+        log_listener.stop()
+
+
+def _resume_listener_in_parent() -> None:
+    """Restart the parent's listener thread once the fork is done."""
+    if _listener_paused_for_fork:
+        log_listener.start()
+
+
+def _restart_listener_after_fork() -> None:
+    """Give a forked child (e.g. a Celery pool process) its own queue and listener thread."""
+    global log_queue, log_listener
+    
+    # Records buffered before the fork belong to the parent
+    for handler in log_listener.handlers:
+        if isinstance(handler, MemoryHandler):
+            handler.buffer.clear()
+    
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, *log_listener.handlers, respect_handler_level=True)
+    log_listener.start()
+    
+    # Point every queue handler at the fresh queue
+    for logger in list(logging.root.manager.loggerDict.values()):
+        for handler in getattr(logger, "handlers", ()):
+            if isinstance(handler, _QueueHandler):
+                handler.queue = log_queue
+
+
+os.register_at_fork(
+    before=_pause_listener_before_fork,
+    after_in_parent=_resume_listener_in_parent,
+    after_in_child=_restart_listener_after_fork,
+)
+
+
+def flush_logs() -> None:
+    """
+    Stop the log listener and write out every queued or buffered record.
+    
+    Call this from processes that exit without running atexit hooks,
+    such as Celery pool workers.
+    """
+    if log_listener._thread is not None:
+        log_listener.stop()
+    
+    # Console records are written as they arrive; only file buffers need flushing
+    for handler in log_listener.handlers:
+        if isinstance(handler, MemoryHandler):
+            handler.flush()
+
+
+atexit.register(flush_logs)
+
+
 def setup_logger(
     name: str,
     log_file: Optional[str] = None,
     level: Optional[str] = None,
 ) -> logging.Logger:
     """
-    Set up a logger with file and console handlers.
+    Set up a logger that writes to the console and an optional file.
+    
+    The logger itself only gets a queue handler; the console and file handlers
+    are owned by the background log listener.
     
     Args:
         name: Logger name
@@ -79,17 +225,7 @@ def setup_logger(
     if logger.handlers:
         return logger
     
-    # Choose formatter
-    if settings.LOG_FORMAT == "json":
-        formatter = JSONFormatter()
-    else:
-        formatter = TextFormatter()
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    logger.addHandler(_QueueHandler(log_queue))
     
     # File handler
     if log_file:
@@ -103,9 +239,19 @@ def setup_logger(
             backupCount=5,
             encoding="utf-8"
         )
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(build_formatter())
+        
+        # Coalesce records into batched writes; errors flush straight away
+        buffered_handler = MemoryHandler(
+            LOG_BUFFER_CAPACITY,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+        )
+        buffered_handler.setLevel(logging.DEBUG)
+        
+        # The listener is shared, so only route this logger's records here
+        buffered_handler.addFilter(logging.Filter(name))
+        log_listener.handlers += (buffered_handler,)
     
     return logger
 
@@ -118,6 +264,30 @@ task_logger = setup_logger("fileconverter.tasks", "tasks.log")
 celery_logger = setup_logger("celery", "celery.log")
 
 
+def _emit(logger: logging.Logger, level: int, site, msg: str, args: tuple, extra: dict) -> None:
+    """
+    Build and dispatch a record for one of the helpers below.
+    
+    The helpers always log from the same place, so the record takes its
+    caller info from the helper function itself instead of having
+    logging walk the stack for every call.
+    
+    Args:
+        logger: Logger to dispatch through
+        level: Log level
+        site: Helper function reported as the record's caller
+        msg: %-style message
+        args: Message arguments
+        extra: Extra record attributes
+    """
+    code = site.__code__
+    record = logger.makeRecord(
+        logger.name, level, code.co_filename, code.co_firstlineno,
+        msg, args, None, code.co_name, extra,
+    )
+    logger.handle(record)
+
+
 def log_task_execution(task_id: str, task_name: str, duration_ms: float, success: bool):
     """
     Log task execution metrics.
@@ -128,6 +298,10 @@ def log_task_execution(task_id: str, task_name: str, duration_ms: float, success
         duration_ms: Execution duration in milliseconds
         success: Whether task succeeded
     """
+    level = logging.INFO if success else logging.ERROR
+    if not task_logger.isEnabledFor(level):
+        return
+    
     log_record = {
         "task_id": task_id,
         "task_name": task_name,
@@ -135,10 +309,8 @@ def log_task_execution(task_id: str, task_name: str, duration_ms: float, success
         "success": success,
     }
     
-    if success:
-        task_logger.info(f"Task completed: {task_name}", extra=log_record)
-    else:
-        task_logger.error(f"Task failed: {task_name}", extra=log_record)
+    msg = "Task completed: %s" if success else "Task failed: %s"
+    _emit(task_logger, level, log_task_execution, msg, (task_name,), log_record)
 
 
 def log_api_request(method: str, path: str, status_code: int, user_ip: str, duration_ms: float):
@@ -152,9 +324,16 @@ def log_api_request(method: str, path: str, status_code: int, user_ip: str, dura
         user_ip: Client IP address
         duration_ms: Request duration in milliseconds
     """
-    access_logger.info(
-        f"{method} {path} - {status_code}",
-        extra={
+    if not access_logger.isEnabledFor(logging.INFO):
+        return
+    
+    _emit(
+        access_logger,
+        logging.INFO,
+        log_api_request,
+        "%s %s - %s",
+        (method, path, status_code),
+        {
             "method": method,
             "path": path,
             "status_code": status_code,
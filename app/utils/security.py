@@ -4,10 +4,9 @@ Handles validation, rate limiting, and security checks.
 """
 import re
 import os
-from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Optional, Dict
-from collections import defaultdict
+import threading
+import time
+from typing import Optional, Dict, Tuple, Union
 
 # Try to import magic, but make it optional for Windows
 try:
@@ -17,22 +16,103 @@ except (ImportError, OSError):
     MAGIC_AVAILABLE = False
     print("WARNING: python-magic not available. Using extension-based validation only.")
 
-from fastapi import HTTPException, UploadFile
+import redis
+from fastapi import HTTPException, Request, UploadFile
+from starlette.datastructures import Headers
 from app.config import settings
+from app.utils.cache import BoundedLRU
 from app.utils.logger import app_logger, error_logger
 
 
-# Rate limiting storage (in production, use Redis)
-rate_limit_storage: Dict[str, list] = defaultdict(list)
+# Filename patterns rejected by check_malicious_filename, in one pass
+MALICIOUS_FILENAME_RE = re.compile(r'\.\.|[/\\]|\x00|^\.')
 
+# Per-pattern checks in reporting priority, used to pick the error message
+# once MALICIOUS_FILENAME_RE has found something
+MALICIOUS_FILENAME_CHECKS = (
+    (re.compile(r'\.\.|[/\\]'), "Invalid filename: path traversal detected"),
+    (re.compile(r'\x00'), "Invalid filename: null byte detected"),
+    (re.compile(r'^\.'), "Hidden files not allowed"),
+)
 
-def validate_mime_type(file_path: str) -> bool:
+
+# str.translate table deleting C0/C1 control characters (U+0000-U+001F, U+007F-U+009F)
+CONTROL_CHARS_TABLE = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)])
+
+# Supported target formats per source format, as sets for constant-time lookups
+CONVERSION_TARGETS = {
+    source: frozenset(targets)
+    for source, targets in settings.SUPPORTED_CONVERSIONS.items()
+}
+
+# libmagic detector, created on first use (loading the magic database is expensive)
+_magic_detector = None
+
+# Rate limit window in seconds
+RATE_LIMIT_WINDOW = 3600
+
+# Redis rate limit client, created on first use
+RATE_LIMIT_REDIS_TIMEOUT = 0.5
+_redis_client: Optional[redis.Redis] = None
+
+# In-memory fallback: fixed-window request counts keyed by (IP, hour bucket),
+# capped so a flood of distinct IPs cannot grow it without bound
+RATE_LIMIT_MAX_TRACKED_IPS = 100_000
+rate_limit_storage: Dict[Tuple[str, int], int] = BoundedLRU(RATE_LIMIT_MAX_TRACKED_IPS)
+rate_limit_bucket = 0
+rate_limit_lock = threading.Lock()
+
+
+def get_client_ip(scope: dict) -> str:
+    """
+    Resolve the client IP address for a request.
+    
+    Honors X-Forwarded-For only when TRUST_PROXY_HEADERS is enabled,
+    since the header is trivially spoofed otherwise.
+    
+    Args:
+        scope: ASGI connection scope
+        
+    Returns:
+        Client IP address
+    """
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded_for = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",", 1)[0].strip()
+    
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class ClientIPMiddleware:
+    """ASGI middleware that resolves the client IP once per request."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            # Exposed to handlers as request.state.client_ip
+            scope.setdefault("state", {})["client_ip"] = get_client_ip(scope)
+        await self.app(scope, receive, send)
+
+
+def _get_magic():
+    """Get the shared libmagic MIME detector (python-magic serializes calls internally)."""
+    global _magic_detector
+    if _magic_detector is None:
+        _magic_detector = magic.Magic(mime=True)
+    return _magic_detector
+
+
+def validate_mime_type(file_data: Union[str, bytes]) -> bool:
     """
     Validate file MIME type using python-magic (if available).
     Falls back to extension-based validation on Windows.
     
     Args:
-        file_path: Path to file
+        file_data: Path to file, or the leading bytes of its content
         
     Returns:
         True if MIME type is allowed
@@ -46,8 +126,11 @@ def validate_mime_type(file_path: str) -> bool:
         return True
     
     try:
-        mime = magic.Magic(mime=True)
-        file_mime_type = mime.from_file(file_path)
+        mime = _get_magic()
+        if isinstance(file_data, bytes):
+            file_mime_type = mime.from_buffer(file_data)
+        else:
+            file_mime_type = mime.from_file(file_data)
         
         if file_mime_type not in settings.ALLOWED_MIME_TYPES:
             error_logger.warning(f"Rejected file with MIME type: {file_mime_type}")
@@ -79,7 +162,11 @@ def validate_file_extension(filename: str) -> bool:
     Raises:
         HTTPException: If extension is not allowed
     """
-    ext = Path(filename).suffix.lower().lstrip('.')
+    # Same result as Path(filename).suffix without building a Path:
+    # no extension for dotfiles or names ending in a dot
+    name = filename.rstrip('/').rpartition('/')[2]
+    dot = name.rfind('.')
+    ext = name[dot + 1:].lower() if 0 < dot < len(name) - 1 else ''
     
     if ext not in settings.ALLOWED_EXTENSIONS:
         raise HTTPException(
@@ -131,10 +218,12 @@ async def validate_upload_file(file: UploadFile, check_mime: bool = False) -> bo
     # Validate extension
     validate_file_extension(file.filename)
     
-    # Validate size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
+    # Validate size (Starlette counts the bytes as it spools the upload)
+    file_size = file.size
+    if file_size is None:
+        file.file.seek(0, 2)  # Seek to end
+        file_size = file.file.tell()
+        file.file.seek(0)  # Reset to beginning
     
     validate_file_size(file_size)
     
@@ -154,26 +243,12 @@ def check_malicious_filename(filename: str) -> bool:
     Raises:
         HTTPException: If filename is suspicious
     """
-    # Check for path traversal attempts
-    if '..' in filename or '/' in filename or '\\' in filename:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid filename: path traversal detected"
-        )
-    
-    # Check for null bytes
-    if '\x00' in filename:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid filename: null byte detected"
-        )
-    
-    # Check for hidden files
-    if filename.startswith('.'):
-        raise HTTPException(
-            status_code=400,
-            detail="Hidden files not allowed"
-        )
+    # Check for path traversal, null bytes and hidden files
+    if MALICIOUS_FILENAME_RE.search(filename):
+        # Report the highest-priority problem, not the leftmost one
+        for pattern, error in MALICIOUS_FILENAME_CHECKS:
+            if pattern.search(filename):
+                raise HTTPException(status_code=400, detail=error)
     
     return True
 
@@ -195,13 +270,14 @@ def validate_conversion_format(source_format: str, target_format: str) -> bool:
     source_format = source_format.lower()
     target_format = target_format.lower()
     
-    if source_format not in settings.SUPPORTED_CONVERSIONS:
+    targets = CONVERSION_TARGETS.get(source_format)
+    if targets is None:
         raise HTTPException(
             status_code=400,
             detail=f"Source format '{source_format}' not supported"
         )
     
-    if target_format not in settings.SUPPORTED_CONVERSIONS[source_format]:
+    if target_format not in targets:
         supported = ', '.join(settings.SUPPORTED_CONVERSIONS[source_format])
         raise HTTPException(
             status_code=400,
@@ -211,10 +287,59 @@ def validate_conversion_format(source_format: str, target_format: str) -> bool:
     return True
 
 
+def _get_redis() -> redis.Redis:
+    """Get the Redis client for rate limit counters (connects lazily)."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.redis_url,
+            socket_timeout=RATE_LIMIT_REDIS_TIMEOUT,
+            socket_connect_timeout=RATE_LIMIT_REDIS_TIMEOUT,
+        )
+    return _redis_client
+
+
+def _count_request_redis(client_ip: str, bucket: int) -> int:
+    """
+    Record a request in Redis and return the window's count.
+    
+    Shared by all app processes; the key expires shortly after its window.
+    """
+    key = f"rl:{client_ip}:{bucket}"
+    pipe = _get_redis().pipeline(transaction=False)
+    pipe.incr(key)
+    pipe.expire(key, RATE_LIMIT_WINDOW + 100, nx=True)
+    request_count, _ = pipe.execute()
+    return request_count
+
+
+def _count_request_memory(client_ip: str, bucket: int) -> int:
+    """Record a request in process memory and return the window's count."""
+    global rate_limit_bucket
+    
+    # enforce_rate_limit runs on threadpool threads, so the prune and the
+    # read-modify-write must not interleave
+    with rate_limit_lock:
+        # New window: counters from earlier windows no longer matter
+        if bucket != rate_limit_bucket:
+            for key in [key for key in rate_limit_storage if key[1] < bucket]:
+                del rate_limit_storage[key]
+            rate_limit_bucket = bucket
+        
+        key = (client_ip, bucket)
+        count = rate_limit_storage.get(key, 0) + 1
+        rate_limit_storage[key] = count
+        return count
+
+
 def check_rate_limit(client_ip: str) -> bool:
     """
     Check if client has exceeded rate limit.
     
+    Counts requests in fixed one-hour windows, in Redis when
+    RATE_LIMIT_BACKEND is "redis" (falling back to process memory if
+    Redis is unreachable).
+    
     Args:
         client_ip: Client IP address
         
@@ -227,31 +352,45 @@ def check_rate_limit(client_ip: str) -> bool:
     if not settings.ENABLE_RATE_LIMITING:
         return True
     
-    current_time = datetime.now()
-    cutoff_time = current_time - timedelta(hours=1)
+    bucket = int(time.time()) // RATE_LIMIT_WINDOW
+    request_count = None
     
-    # Clean old requests
-    rate_limit_storage[client_ip] = [
-        timestamp for timestamp in rate_limit_storage[client_ip]
-        if timestamp > cutoff_time
-    ]
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            request_count = _count_request_redis(client_ip, bucket)
+        except redis.RedisError as e:
+            app_logger.warning(f"Redis rate limiting unavailable, using in-memory counts: {e}")
     
-    # Check limit
-    request_count = len(rate_limit_storage[client_ip])
+    if request_count is None:
+        request_count = _count_request_memory(client_ip, bucket)
     
-    if request_count >= settings.RATE_LIMIT_PER_HOUR:
+    # Check limit
+    if request_count > settings.RATE_LIMIT_PER_HOUR:
         app_logger.warning(f"Rate limit exceeded for IP: {client_ip}")
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded. Maximum {settings.RATE_LIMIT_PER_HOUR} conversions per hour."
         )
     
-    # Add current request
-    rate_limit_storage[client_ip].append(current_time)
-    
     return True
 
 
+def enforce_rate_limit(request: Request) -> None:
+    """
+    FastAPI dependency that applies check_rate_limit to the calling client.
+    
+    Declared as a plain function so FastAPI runs it in the threadpool,
+    keeping the Redis round trip off the event loop.
+    
+    Args:
+        request: FastAPI request object
+        
+    Raises:
+        HTTPException: If rate limit exceeded
+    """
+    check_rate_limit(request.state.client_ip)
+
+
 def sanitize_input(text: str, max_length: int = 1000) -> str:
     """
     Sanitize user input text.
@@ -264,7 +403,7 @@ def sanitize_input(text: str, max_length: int = 1000) -> str:
         Sanitized text
     """
     # Remove control characters
-    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+    text = text.translate(CONTROL_CHARS_TABLE)
     
     # Limit length
     text = text[:max_length]
@@ -3,8 +3,9 @@ Celery application configuration for FileConverter Pro.
 """
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 
-from app.config import settings
+from app.config import settings, ensure_directories
 
 # Create Celery app
 celery_app = Celery(
@@ -17,6 +18,7 @@ celery_app = Celery(
 # Configure Celery
 celery_app.conf.update(
     task_serializer=settings.CELERY_TASK_SERIALIZER,
+    task_compression=settings.CELERY_TASK_COMPRESSION,
     result_serializer=settings.CELERY_RESULT_SERIALIZER,
     accept_content=settings.CELERY_ACCEPT_CONTENT,
     timezone=settings.CELERY_TIMEZONE,
@@ -42,5 +44,12 @@ celery_app.conf.beat_schedule = {
     },
 }
 
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Create required directories when a worker process starts."""
+    ensure_directories()
+
+
 if __name__ == '__main__':
     celery_app.start()
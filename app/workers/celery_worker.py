@@ -2,12 +2,15 @@
 Celery worker tasks for FileConverter Pro.
 Handles background file conversions and maintenance tasks.
 """
+import logging
 import os
 import time
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import datetime
 
 from celery import Task
+from celery.signals import after_setup_task_logger, worker_process_shutdown
 from celery.utils.log import get_task_logger
 
 from app.workers.celery_app import celery_app
@@ -18,26 +21,105 @@ from app.utils.file_utils import (
     generate_unique_filename,
     get_file_extension,
     cleanup_old_files,
-    secure_delete_file,
+    retention_cutoff,
     get_conversion_output_filename,
 )
-from app.utils.logger import log_task_execution
+from app.utils.logger import log_task_execution, flush_logs
 
 # Celery task logger
 logger = get_task_logger(__name__)
 
+# Cached DEBUG check for frequent task log calls, refreshed once Celery
+# has configured the task logger
+_DEBUG = logger.isEnabledFor(logging.DEBUG)
+
+
+@after_setup_task_logger.connect
+def refresh_debug_flag(**kwargs):
+    """Recompute the cached DEBUG check after Celery (re)configures logging."""
+    global _DEBUG
+    _DEBUG = logger.isEnabledFor(logging.DEBUG)
+
 
 class ConversionTask(Task):
     """Base class for conversion tasks with error handling."""
     
+    # Name reported in task execution metrics
+    TASK_SHORT_NAME = 'process_conversion_task'
+    
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         """Handle task failure."""
-        logger.error(f"Task {task_id} failed: {exc}")
+        logger.error("Task %s failed: %s", task_id, exc)
         log_task_execution(task_id, self.name, 0, False)
     
     def on_success(self, retval, task_id, args, kwargs):
         """Handle task success."""
-        logger.info(f"Task {task_id} succeeded")
+        logger.info("Task %s succeeded", task_id)
+
+
+def _run_conversion_job(
+    job: Tuple[Dict[str, str], str, str, str],
+    target_format: str,
+    batched: Dict[str, Union[str, ConversionError]],
+) -> Tuple[Optional[Dict[str, str]], Optional[Dict[str, str]]]:
+    """
+    Convert one planned file of a conversion task.
+    
+    Args:
+        job: Tuple of (file info, source format, output filename, output path)
+        target_format: Target conversion format
+        batched: Results of the batched DOCX conversion, keyed by input path
+        
+    Returns:
+        Tuple of (output file entry, error entry); exactly one is None
+    """
+    file_info, source_format, output_filename, output_path = job
+    input_path = file_info['path']
+    original_filename = file_info['filename']
+    
+    try:
+        if input_path in batched:
+            result_path = batched[input_path]
+            if isinstance(result_path, ConversionError):
+                raise result_path
+        else:
+            # Convert file
+            logger.info("Converting %s (%s -> %s)", original_filename, source_format, target_format)
+            
+            result_path = converter.convert_file(
+                input_path,
+                output_path,
+                source_format,
+                target_format
+            )
+        
+        # Handle PDF to images (multiple outputs)
+        if source_format == 'pdf' and target_format in ['jpg', 'jpeg', 'png']:
+            # PDF to images returns list, but we stored first page earlier
+            # For multiple pages, we need to handle differently
+            return {
+                'path': result_path,
+                'filename': os.path.basename(result_path),
+                'original_filename': original_filename,
+            }, None
+        
+        return {
+            'path': result_path,
+            'filename': output_filename,
+            'original_filename': original_filename,
+        }, None
+        
+    except ConversionError as e:
+        logger.error("Conversion failed for %s: %s", original_filename, e)
+        error = str(e)
+    except Exception as e:
+        logger.error("Unexpected error for %s: %s", original_filename, e)
+        error = str(e)
+    
+    return None, {
+        'filename': original_filename,
+        'error': error
+    }
 
 
 @celery_app.task(
@@ -64,72 +146,57 @@ def process_conversion_task(
     Returns:
         Dict with conversion results
     """
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     task_id = self.request.id
     
-    logger.info(f"Starting conversion task {task_id}: {len(input_files)} file(s) to {target_format}")
+    logger.info("Starting conversion task %s: %d file(s) to %s", task_id, len(input_files), target_format)
     
     try:
         output_files = []
         errors = []
         
-        # Process each file
+        # Plan output paths up front so DOCX files can be converted together
+        jobs = []
         for file_info in input_files:
-            input_path = file_info['path']
-            original_filename = file_info['filename']
-            
+            output_filename = generate_unique_filename(
+                get_conversion_output_filename(file_info['filename'], target_format)
+            )
+            jobs.append((
+                file_info,
+                get_file_extension(file_info['filename']),
+                output_filename,
+                os.path.join(settings.OUTPUT_DIR, output_filename),
+            ))
+        
+        # Convert all DOCX files with a single LibreOffice run
+        batched: Dict[str, Union[str, ConversionError]] = {}
+        docx_jobs = [job for job in jobs if job[1] == 'docx'] if target_format == 'pdf' else []
+        if len(docx_jobs) > 1:
+            docx_inputs = [file_info['path'] for file_info, _, _, _ in docx_jobs]
+            logger.info("Converting %d DOCX files to PDF in one batch", len(docx_inputs))
             try:
-                # Get source format
-                source_format = get_file_extension(original_filename)
-                
-                # Generate output filename
-                output_filename = get_conversion_output_filename(
-                    original_filename,
-                    target_format
-                )
-                output_filename = generate_unique_filename(output_filename)
-                output_path = os.path.join(settings.OUTPUT_DIR, output_filename)
-                
-                # Convert file
-                logger.info(f"Converting {original_filename} ({source_format} -> {target_format})")
-                
-                result_path = converter.convert_file(
-                    input_path,
-                    output_path,
-                    source_format,
-                    target_format
+                converted = converter.convert_docx_batch_to_pdf(
+                    docx_inputs,
+                    [output_path for _, _, _, output_path in docx_jobs]
                 )
-                
-                # Handle PDF to images (multiple outputs)
-                if source_format == 'pdf' and target_format in ['jpg', 'jpeg', 'png']:
-                    # PDF to images returns list, but we stored first page earlier
-                    # For multiple pages, we need to handle differently
-                    output_files.append({
-                        'path': result_path,
-                        'filename': os.path.basename(result_path),
-                        'original_filename': original_filename,
-                    })
-                else:
-                    output_files.append({
-                        'path': result_path,
-                        'filename': output_filename,
-                        'original_filename': original_filename,
-                    })
-                
+                missing = ConversionError("LibreOffice did not create output file")
+                batched = {path: converted.get(path, missing) for path in docx_inputs}
             except ConversionError as e:
-                error_msg = f"Conversion failed for {original_filename}: {str(e)}"
-                logger.error(error_msg)
-                errors.append({
-                    'filename': original_filename,
-                    'error': str(e)
-                })
-            except Exception as e:
-                error_msg = f"Unexpected error for {original_filename}: {str(e)}"
-                logger.error(error_msg)
-                errors.append({
-                    'filename': original_filename,
-                    'error': str(e)
-                })
+                batched = dict.fromkeys(docx_inputs, e)
+        
+        # Process files in parallel; conversions mostly wait on native code
+        # and subprocesses, and map() keeps results in submission order
+        max_workers = max(1, min(len(jobs), settings.MAX_CONCURRENT_CONVERSIONS))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda job: _run_conversion_job(job, target_format, batched),
+                jobs
+            )
+            for output_file, error in results:
+                if output_file is not None:
+                    output_files.append(output_file)
+                else:
+                    errors.append(error)
         
         # If no files were successfully converted
         if not output_files:
@@ -141,8 +208,9 @@ def process_conversion_task(
             zip_filename = f"converted_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
             zip_path = os.path.join(settings.OUTPUT_DIR, zip_filename)
             
+            # Outputs are deleted as they are archived
             output_paths = [f['path'] for f in output_files]
-            converter.create_zip_archive(output_paths, zip_path)
+            converter.create_zip_archive(output_paths, zip_path, remove_sources=True)
             
             final_output = {
                 'type': 'zip',
@@ -150,10 +218,6 @@ def process_conversion_task(
                 'path': zip_path,
                 'files_count': len(output_files),
             }
-            
-            # Clean up individual files
-            for output_file in output_files:
-                secure_delete_file(output_file['path'])
         else:
             final_output = {
                 'type': 'single',
@@ -162,10 +226,10 @@ def process_conversion_task(
             }
         
         # Calculate execution time
-        duration_ms = (time.time() - start_time) * 1000
-        log_task_execution(task_id, 'process_conversion_task', duration_ms, True)
+        duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        log_task_execution(task_id, self.TASK_SHORT_NAME, duration_ms, True)
         
-        logger.info(f"Conversion task {task_id} completed in {duration_ms:.2f}ms")
+        logger.info("Conversion task %s completed in %.2fms", task_id, duration_ms)
         
         return {
             'status': 'success',
@@ -178,9 +242,9 @@ def process_conversion_task(
         }
         
     except ConversionError as e:
-        logger.error(f"Conversion task {task_id} failed: {e}")
-        duration_ms = (time.time() - start_time) * 1000
-        log_task_execution(task_id, 'process_conversion_task', duration_ms, False)
+        logger.error("Conversion task %s failed: %s", task_id, e)
+        duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        log_task_execution(task_id, self.TASK_SHORT_NAME, duration_ms, False)
         
         return {
             'status': 'failed',
@@ -190,9 +254,9 @@ def process_conversion_task(
         }
     
     except Exception as e:
-        logger.error(f"Unexpected error in task {task_id}: {e}")
-        duration_ms = (time.time() - start_time) * 1000
-        log_task_execution(task_id, 'process_conversion_task', duration_ms, False)
+        logger.error("Unexpected error in task %s: %s", task_id, e)
+        duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        log_task_execution(task_id, self.TASK_SHORT_NAME, duration_ms, False)
         
         # Retry on unexpected errors
         if self.request.retries < self.max_retries:
@@ -206,6 +270,18 @@ def process_conversion_task(
         }
 
 
+@worker_process_shutdown.connect
+def remove_libreoffice_profile(**kwargs):
+    """Remove the exiting worker process's LibreOffice profile."""
+    converter.remove_libreoffice_profile()
+
+
+@worker_process_shutdown.connect
+def flush_worker_logs(**kwargs):
+    """Write out log records still queued when the worker process exits."""
+    flush_logs()
+
+
 @celery_app.task(name='app.workers.celery_worker.cleanup_old_files_task')
 def cleanup_old_files_task():
     """
@@ -215,21 +291,18 @@ def cleanup_old_files_task():
     logger.info("Starting scheduled file cleanup")
     
     try:
+        # One cutoff for both directories
+        cutoff_ts = retention_cutoff(settings.FILE_RETENTION_MINUTES)
+        
         # Clean input directory
-        input_deleted = cleanup_old_files(
-            settings.INPUT_DIR,
-            settings.FILE_RETENTION_MINUTES
-        )
+        input_deleted = cleanup_old_files(settings.INPUT_DIR, cutoff_ts=cutoff_ts)
         
         # Clean output directory
-        output_deleted = cleanup_old_files(
-            settings.OUTPUT_DIR,
-            settings.FILE_RETENTION_MINUTES
-        )
+        output_deleted = cleanup_old_files(settings.OUTPUT_DIR, cutoff_ts=cutoff_ts)
         
         total_deleted = input_deleted + output_deleted
         
-        logger.info(f"Cleanup completed: {total_deleted} files deleted")
+        logger.info("Cleanup completed: %d files deleted", total_deleted)
         
         return {
             'status': 'success',
@@ -239,7 +312,7 @@ def cleanup_old_files_task():
         }
         
     except Exception as e:
-        logger.error(f"Cleanup task failed: {e}")
+        logger.error("Cleanup task failed: %s", e)
         return {
             'status': 'failed',
             'error': str(e),
@@ -252,7 +325,8 @@ def worker_heartbeat_task():
     Scheduled task to log worker heartbeat.
     Runs every 60 seconds via Celery Beat.
     """
-    logger.debug("Worker heartbeat")
+    if _DEBUG:
+        logger.debug("Worker heartbeat")
     
     return {
         'status': 'alive',
@@ -265,8 +339,8 @@ def get_storage_stats_task():
     """Get current storage statistics."""
     try:
         stats = storage.get_storage_usage()
-        logger.info(f"Storage stats: {stats}")
+        logger.info("Storage stats: %s", stats)
         return stats
     except Exception as e:
-        logger.error(f"Error getting storage stats: {e}")
+        logger.error("Error getting storage stats: %s", e)
         return {'error': str(e)}
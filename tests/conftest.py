@@ -0,0 +1,18 @@
+"""
+Shared test configuration for FileConverter Pro.
+Points every storage and log directory at a throwaway location before the
+app modules (which read settings at import) are loaded.
+"""
+import os
+import tempfile
+
+_ROOT = tempfile.mkdtemp(prefix="fileconverter-tests-")
+
+for _name in ("TEMP_DIR", "INPUT_DIR", "OUTPUT_DIR", "LOG_DIR", "TEMPLATE_CACHE_DIR"):
+    os.environ.setdefault(_name, os.path.join(_ROOT, _name.lower()))
+
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+
+from app.config import ensure_directories  # noqa: E402
+
+ensure_directories()
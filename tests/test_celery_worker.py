@@ -0,0 +1,119 @@
+"""
+Tests for the conversion Celery task.
+"""
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+from PIL import Image
+
+from app.config import settings
+from app.services import conversions
+from app.services.conversions import converter
+from app.workers.celery_worker import process_conversion_task
+
+
+def _make_pdf(path: str, pages: int) -> None:
+    """Write a small image-only PDF with the given number of pages."""
+    images = [Image.new("RGB", (120, 80), (40 * i, 90, 160)) for i in range(pages)]
+    images[0].save(path, "PDF", save_all=True, append_images=images[1:])
+
+
+def _upload_pdfs(count: int) -> list:
+    """Create PDF uploads in INPUT_DIR, as the API would."""
+    files = []
+    for i in range(count):
+        path = os.path.join(settings.INPUT_DIR, f"upload{i}_doc{i}.pdf")
+        _make_pdf(path, pages=2)
+        files.append({"path": path, "filename": f"doc{i}.pdf"})
+    return files
+
+
+@pytest.fixture
+def pymupdf_usage(monkeypatch):
+    """Record how many PyMuPDF documents are open at the same time."""
+    if conversions.pymupdf is None:
+        pytest.skip("PyMuPDF is not installed")
+    
+    usage = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+    open_document = conversions.pymupdf.open
+    
+    class TrackedDocument:
+        def __init__(self, doc):
+            self.doc = doc
+        
+        def __enter__(self):
+            with lock:
+                usage["active"] += 1
+                usage["peak"] = max(usage["peak"], usage["active"])
+            # Widen the window in which an unserialized caller would overlap
+            time.sleep(0.05)
+            return self.doc.__enter__()
+        
+        def __exit__(self, *exc_info):
+            with lock:
+                usage["active"] -= 1
+            return self.doc.__exit__(*exc_info)
+    
+    monkeypatch.setattr(
+        conversions.pymupdf,
+        "open",
+        lambda *args, **kwargs: TrackedDocument(open_document(*args, **kwargs)),
+    )
+    return usage
+
+
+def test_two_pdfs_to_images_render_one_at_a_time(pymupdf_usage):
+    files = _upload_pdfs(2)
+    
+    result = process_conversion_task.apply(args=(files, "png")).get()
+    
+    assert result["status"] == "success"
+    assert result["errors"] is None
+    assert result["successful_files"] == 2
+    assert pymupdf_usage["peak"] == 1
+    
+    with zipfile.ZipFile(result["output"]["path"]) as archive:
+        names = archive.namelist()
+    assert len(names) == 2
+    assert all(name.endswith(".png") for name in names)
+
+
+def test_two_pdfs_to_docx_in_one_task():
+    files = _upload_pdfs(2)
+    
+    result = process_conversion_task.apply(args=(files, "docx")).get()
+    
+    assert result["status"] == "success"
+    assert result["errors"] is None
+    assert result["successful_files"] == 2
+    
+    with zipfile.ZipFile(result["output"]["path"]) as archive:
+        names = archive.namelist()
+    assert len(names) == 2
+    assert all(name.endswith(".docx") for name in names)
+
+
+def test_missing_libreoffice_fails_only_docx_files(monkeypatch):
+    monkeypatch.setattr(converter, "libreoffice_path", "/nonexistent/soffice")
+    
+    files = []
+    for name in ("report.docx", "notes.docx"):
+        path = os.path.join(settings.INPUT_DIR, f"upload_{name}")
+        with open(path, "wb") as f:
+            f.write(b"not really a document")
+        files.append({"path": path, "filename": name})
+    
+    image_path = os.path.join(settings.INPUT_DIR, "upload_picture.png")
+    Image.new("RGB", (32, 32), (200, 30, 30)).save(image_path)
+    files.append({"path": image_path, "filename": "picture.png"})
+    
+    result = process_conversion_task.apply(args=(files, "pdf")).get()
+    
+    assert result["status"] == "success"
+    assert result["successful_files"] == 1
+    assert sorted(error["filename"] for error in result["errors"]) == ["notes.docx", "report.docx"]
+    assert result["output"]["type"] == "single"
@@ -0,0 +1,45 @@
+"""
+Tests for the file conversion service.
+"""
+from PIL import Image
+
+from app.services.conversions import converter
+
+
+def _make_jpeg(path) -> bytes:
+    Image.new("RGB", (64, 48), (30, 120, 200)).save(path, "JPEG", quality=70)
+    return path.read_bytes()
+
+
+def test_same_format_at_default_quality_is_copied(tmp_path):
+    source = tmp_path / "photo.jpg"
+    original = _make_jpeg(source)
+    output = tmp_path / "out.jpg"
+    
+    converter.convert_image(str(source), str(output), "jpg", source_format="jpg")
+    
+    assert output.read_bytes() == original
+
+
+def test_same_format_with_custom_quality_is_reencoded(tmp_path):
+    source = tmp_path / "photo.jpg"
+    original = _make_jpeg(source)
+    output = tmp_path / "out.jpg"
+    
+    converter.convert_image(str(source), str(output), "jpg", quality=40, source_format="jpg")
+    
+    assert output.read_bytes() != original
+    with Image.open(output) as img:
+        assert img.format == "JPEG"
+
+
+def test_mislabeled_source_is_reencoded(tmp_path):
+    # A PNG uploaded with a .jpg name must not be copied through as "JPEG"
+    source = tmp_path / "photo.jpg"
+    Image.new("RGB", (64, 48), (200, 30, 30)).save(source, "PNG")
+    output = tmp_path / "out.jpg"
+    
+    converter.convert_image(str(source), str(output), "jpg", source_format="jpg")
+    
+    with Image.open(output) as img:
+        assert img.format == "JPEG"
@@ -0,0 +1,28 @@
+"""
+Tests for the background log listener.
+"""
+import os
+
+import pytest
+
+from app.utils import logger as log_module
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_listener_is_paused_across_fork_and_restarted():
+    assert log_module.log_listener._thread is not None
+    
+    pid = os.fork()
+    if pid == 0:
+        # Child: gets its own running listener and can log and flush
+        ok = log_module.log_listener._thread is not None
+        log_module.task_logger.info("forked child %d", os.getpid())
+        log_module.flush_logs()
+        os._exit(0 if ok else 1)
+    
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    
+    # Parent: the listener thread was restarted after the fork
+    assert log_module.log_listener._thread is not None
+    assert log_module.log_listener._thread.is_alive()
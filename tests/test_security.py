@@ -0,0 +1,58 @@
+"""
+Tests for request validation and rate limiting.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils import security
+
+
+@pytest.mark.parametrize("filename, detail", [
+    (".a/b", "Invalid filename: path traversal detected"),
+    ("a\x00..", "Invalid filename: path traversal detected"),
+    (".\x00name", "Invalid filename: null byte detected"),
+    ("..hidden", "Invalid filename: path traversal detected"),
+    ("dir\\file.pdf", "Invalid filename: path traversal detected"),
+    ("report.pdf\x00.exe", "Invalid filename: null byte detected"),
+    (".env", "Hidden files not allowed"),
+])
+def test_malicious_filename_reports_by_priority(filename, detail):
+    with pytest.raises(HTTPException) as exc_info:
+        security.check_malicious_filename(filename)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == detail
+
+
+@pytest.mark.parametrize("filename", ["report.pdf", "my.file.v2.docx", "a.b"])
+def test_safe_filenames_pass(filename):
+    assert security.check_malicious_filename(filename) is True
+
+
+def test_memory_rate_limit_counts_concurrent_requests(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_RATE_LIMITING", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_HOUR", 10_000)
+    security.rate_limit_storage.clear()
+    
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda _: security.check_rate_limit("203.0.113.7"), range(2_000)))
+    
+    bucket = security.rate_limit_bucket
+    assert security.rate_limit_storage[("203.0.113.7", bucket)] == 2_000
+
+
+def test_memory_rate_limit_rejects_over_limit(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_RATE_LIMITING", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_HOUR", 2)
+    security.rate_limit_storage.clear()
+    
+    security.check_rate_limit("198.51.100.4")
+    security.check_rate_limit("198.51.100.4")
+    
+    with pytest.raises(HTTPException) as exc_info:
+        security.check_rate_limit("198.51.100.4")
+    assert exc_info.value.status_code == 429